@@ -5,6 +5,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,6 +22,13 @@ st.set_page_config(
 # Constants
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
+PAGE_SIZE = 500
+SEARCH_LIMIT = 1000
+RATING_OPTIONS = [5, 4, 3, 2, 1]
+DISPLAY_FIELDS = "id,timestamp,rating,review,ai_response,ai_summary,recommended_actions"
+LIVE_WAIT_SECONDS = 0.5
+# Events only cover writes on the backend worker serving the stream, so live mode also resyncs on a timer
+LIVE_RESYNC_SECONDS = 30
 
 def check_admin_password():
     """Authenticate admin user before allowing dashboard access."""
@@ -45,20 +54,142 @@ def check_admin_password():
 check_admin_password()
 
 @st.cache_data(ttl=30)
-def fetch_submissions():
-    """Retrieve all submissions from backend API."""
+def fetch_analytics():
+    """Retrieve aggregate counts from the backend's running totals."""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/submissions", timeout=5)
+        response = requests.get(f"{BACKEND_URL}/api/analytics", timeout=5)
         if response.status_code == 200:
+            return response.json()
+    except Exception as e:
+        st.error(f"Failed to fetch analytics: {str(e)}")
+    return {}
+
+@st.cache_data(ttl=30)
+def fetch_submissions(ratings=None, date_from=None, date_to=None, keyword=""):
+    """Retrieve the submissions matching the filters from backend API, one page at a time (or best matches for a keyword)."""
+    rows = []
+    params = {"limit": PAGE_SIZE, "fields": DISPLAY_FIELDS}
+    if ratings:
+        params["rating_in"] = ",".join(str(r) for r in ratings)
+    if date_from:
+        params["from"] = date_from.isoformat()
+    if date_to:
+        # The API's upper bound is exclusive, so stop at the start of the next day.
+        params["to"] = (date_to + timedelta(days=1)).isoformat()
+    try:
+        if keyword:
+            # Keyword searches go through the backend's ranked full-text index
+            params["q"] = keyword
+            params["limit"] = SEARCH_LIMIT
+            del params["fields"]
+            response = requests.get(f"{BACKEND_URL}/api/search", params=params, timeout=5)
+            if response.status_code == 200:
+                rows = response.json()
+            return pd.DataFrame(rows)
+        
+        while True:
+            response = requests.get(f"{BACKEND_URL}/api/submissions", params=params, timeout=5)
+            if response.status_code != 200:
+                break
             data = response.json()
-            if isinstance(data, list):
-                return pd.DataFrame(data)
-            return pd.DataFrame()
+            if not isinstance(data, list):
+                break
+            rows.extend(data)
+            
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            params["after"] = next_cursor
     except Exception as e:
         st.error(f"Failed to fetch submissions: {str(e)}")
     
+    return pd.DataFrame(rows)
+
+@st.cache_data(ttl=30)
+def fetch_timeseries(bucket="day", date_from=None, date_to=None):
+    """Retrieve hourly or daily rollups with one n_<stars> column per rating."""
+    params = {"bucket": bucket}
+    if date_from:
+        params["from"] = date_from.isoformat()
+    if date_to:
+        params["to"] = (date_to + timedelta(days=1)).isoformat()
+    try:
+        response = requests.get(f"{BACKEND_URL}/api/analytics/timeseries", params=params, timeout=5)
+        if response.status_code == 200:
+            points = response.json()["points"]
+            return pd.DataFrame([
+                {"bucket": pd.to_datetime(p["bucket"]), **{f"n_{k}": n for k, n in p["histogram"].items()}}
+                for p in points
+            ])
+    except Exception as e:
+        st.error(f"Failed to fetch timeseries: {str(e)}")
     return pd.DataFrame()
 
+def sync_submissions():
+    """
+    Keep a session copy of all submissions current using the backend's change feed.
+    Only rows inserted, updated or deleted since the last sync are transferred.
+    """
+    state = st.session_state
+    try:
+        response = requests.get(
+            f"{BACKEND_URL}/api/changes",
+            params={"since": state.get("sync_seq", 0), "fields": DISPLAY_FIELDS},
+            timeout=5
+        )
+        if response.status_code == 200:
+            changes = response.json()
+            if changes["reset"]:
+                state.sync_rows = {}
+            rows = state.setdefault("sync_rows", {})
+            for submission_id in changes["deletes"]:
+                rows.pop(submission_id, None)
+            for row in changes["upserts"]:
+                rows[row["id"]] = row
+            if changes["reset"] or changes["deletes"] or changes["upserts"] or "sync_df" not in state:
+                state.sync_df = pd.DataFrame(list(rows.values()))
+            state.sync_seq = changes["seq"]
+    except Exception as e:
+        st.error(f"Failed to sync submissions: {str(e)}")
+    
+    return state.get("sync_df", pd.DataFrame()).copy()
+
+class LiveUpdates:
+    """
+    Background listener on the backend's SSE stream, shared by all sessions.
+    Each event bumps `version`; sessions wait until it moves past the version they last rendered.
+    """
+    
+    def __init__(self, url):
+        self.url = url
+        self.version = 0
+        self._changed = threading.Condition()
+        threading.Thread(target=self._run, name="live-updates", daemon=True).start()
+    
+    def _run(self):
+        while True:
+            try:
+                with requests.get(self.url, stream=True, timeout=(5, 60)) as response:
+                    for line in response.iter_lines(decode_unicode=True):
+                        # Dropped/overflow notices count too; sessions resync from /api/changes
+                        if line and line.startswith("event:"):
+                            with self._changed:
+                                self.version += 1
+                                self._changed.notify_all()
+            except Exception:
+                pass
+            time.sleep(2)
+    
+    def wait_for_change(self, seen, timeout):
+        """Block up to timeout seconds for a version other than seen; returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen, timeout)
+            return self.version
+
+@st.cache_resource
+def live_updates():
+    return LiveUpdates(f"{BACKEND_URL}/api/events")
+
 def export_to_csv(df):
     """Convert dataframe to CSV format for download."""
     return df.to_csv(index=False).encode('utf-8')
@@ -69,49 +200,50 @@ st.markdown("Live feedback monitoring and analytics")
 st.markdown("---")
 
 col1, col2 = st.columns([10, 2])
+with col1:
+    live = st.toggle("Live updates", value=False, key="live_updates")
 with col2:
     if st.button("Refresh", key="refresh_btn"):
         st.cache_data.clear()
         st.rerun()
 
-# Load and process data
-df = fetch_submissions()
+if live:
+    listener = live_updates()
+    resync = st.session_state.pop("live_resync", False)
+    if resync or st.session_state.get("live_version") not in (None, listener.version):
+        # Something changed since the last render; filtered views and totals are cached
+        fetch_submissions.clear()
+        fetch_analytics.clear()
+        fetch_timeseries.clear()
+    st.session_state.live_version = listener.version
 
-if df.empty:
+analytics = fetch_analytics()
+total_submissions = analytics.get("total_submissions", 0)
+
+if not total_submissions:
     st.warning("No submissions yet. Check back soon!")
     st.stop()
 
-# Data preprocessing
-if 'timestamp' in df.columns and df['timestamp'].dtype == 'object':
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-    df['date'] = df['timestamp'].dt.date
-    df['hour'] = df['timestamp'].dt.hour
-else:
-    df['date'] = pd.Timestamp.now().date()
-
 # Key Metrics Section
 st.subheader("Key Metrics")
 
+distribution = analytics.get("rating_distribution", {})
 metric_col1, metric_col2, metric_col3, metric_col4, metric_col5 = st.columns(5)
 
 with metric_col1:
-    st.metric("Total Submissions", len(df))
+    st.metric("Total Submissions", total_submissions)
 
 with metric_col2:
-    avg_rating = df['rating'].mean()
-    st.metric("Avg Rating", f"{avg_rating:.1f}⭐", delta=None)
+    st.metric("Avg Rating", f"{analytics.get('avg_rating', 0):.1f}⭐", delta=None)
 
 with metric_col3:
-    five_star_count = (df['rating'] == 5).sum()
-    st.metric("5-Star Reviews", five_star_count)
+    st.metric("5-Star Reviews", distribution.get("5_stars", 0))
 
 with metric_col4:
-    three_star_count = (df['rating'] == 3).sum()
-    st.metric("3-Star Reviews", three_star_count)
+    st.metric("3-Star Reviews", distribution.get("3_stars", 0))
 
 with metric_col5:
-    one_star_count = (df['rating'] == 1).sum()
-    st.metric("1-Star Reviews", one_star_count)
+    st.metric("1-Star Reviews", distribution.get("1_star", 0))
 
 st.markdown("---")
 
@@ -121,24 +253,22 @@ st.subheader("Filters")
 filter_col1, filter_col2, filter_col3 = st.columns(3)
 
 with filter_col1:
-    all_ratings = sorted(df['rating'].unique(), reverse=True)
     selected_ratings = st.multiselect(
         "Filter by Rating:",
-        options=all_ratings,
-        default=all_ratings,
+        options=RATING_OPTIONS,
+        default=RATING_OPTIONS,
         key="rating_filter"
     )
     
     if not selected_ratings:
-        selected_ratings = all_ratings
+        selected_ratings = RATING_OPTIONS
 
 with filter_col2:
+    all_dates = st.checkbox("All dates", value=True, key="all_dates")
     date_range = st.date_input(
         "Date Range:",
-        value=(
-            df['date'].min() if len(df) > 0 else datetime.now().date(),
-            datetime.now().date()
-        ),
+        value=(datetime.now().date() - timedelta(days=30), datetime.now().date()),
+        disabled=all_dates,
         key="date_range"
     )
 
@@ -149,24 +279,27 @@ with filter_col3:
         key="search_box"
     )
 
-# Apply filters
-if selected_ratings:
-    filtered_df = df[df['rating'].isin(selected_ratings)].copy()
+# Filters are applied by the backend, so only matching rows are transferred;
+# the unfiltered view is kept current from the change feed instead
+date_from = date_to = None
+if not all_dates and len(date_range) == 2:
+    date_from, date_to = date_range
+rating_filter = tuple(sorted(selected_ratings)) if set(selected_ratings) != set(RATING_OPTIONS) else None
+
+if rating_filter or date_from or search_keyword.strip():
+    filtered_df = fetch_submissions(rating_filter, date_from, date_to, search_keyword.strip())
 else:
-    filtered_df = df.copy()
+    filtered_df = sync_submissions()
 
-if len(date_range) == 2:
-    filtered_df = filtered_df[
-        (filtered_df['date'] >= date_range[0]) &
-        (filtered_df['date'] <= date_range[1])
-    ]
+if filtered_df.empty:
+    filtered_df = pd.DataFrame(columns=DISPLAY_FIELDS.split(","))
 
-if search_keyword:
-    filtered_df = filtered_df[
-        filtered_df['review'].str.contains(search_keyword, case=False, na=False)
-    ]
+# Data preprocessing
+filtered_df['timestamp'] = pd.to_datetime(filtered_df['timestamp'], errors='coerce')
+filtered_df['date'] = filtered_df['timestamp'].dt.date
+filtered_df['hour'] = filtered_df['timestamp'].dt.hour
 
-st.markdown(f"**Showing {len(filtered_df)} of {len(df)} submissions**")
+st.markdown(f"**Showing {len(filtered_df)} of {total_submissions} submissions**")
 st.markdown("---")
 
 # Submissions Table
@@ -222,17 +355,37 @@ with chart_col1:
     else:
         st.info("No data to display for selected filters.")
 
+# Trend and sentiment come from the backend's hourly/daily rollups, narrowed to
+# the selected ratings using each bucket's per-star counts
+trend_bucket = "hour" if date_from and (date_to - date_from).days < 2 else "day"
+rollups = fetch_timeseries(trend_bucket, date_from, date_to)
+star_columns = [f"n_{k}" for k in sorted(selected_ratings) if f"n_{k}" in rollups.columns]
+if star_columns:
+    selected_counts = rollups[star_columns].sum(axis=1)
+    rollups = rollups.assign(
+        count=selected_counts,
+        avg_rating=sum(rollups[c] * int(c[2:]) for c in star_columns) / selected_counts.where(selected_counts > 0)
+    )[selected_counts > 0]
+if search_keyword.strip():
+    # Rollups cannot apply a keyword, so sentiment counts the matched submissions instead
+    matched_counts = filtered_df['rating'].value_counts() if len(filtered_df) > 0 else {}
+    star_totals = {k: int(matched_counts.get(k, 0)) for k in RATING_OPTIONS}
+else:
+    star_totals = {k: int(rollups[f"n_{k}"].sum()) if star_columns and k in selected_ratings else 0 for k in RATING_OPTIONS}
+rollup_total = sum(star_totals.values())
+
 with chart_col2:
     st.markdown("**Rating Trend Over Time**")
-    if len(filtered_df) > 0 and 'date' in filtered_df.columns:
-        daily_avg = filtered_df.groupby('date')['rating'].mean()
+    if star_columns and len(rollups) > 0:
         fig_trend = px.line(
-            x=daily_avg.index,
-            y=daily_avg.values,
-            labels={'x': 'Date', 'y': 'Avg Rating'},
+            x=rollups['bucket'],
+            y=rollups['avg_rating'],
+            labels={'x': 'Hour' if trend_bucket == "hour" else 'Date', 'y': 'Avg Rating'},
             markers=True
         )
         st.plotly_chart(fig_trend, config={'displayModeBar': True})
+        if search_keyword.strip():
+            st.caption("Trend covers the rating and date filters; keyword search is not applied.")
     else:
         st.info("No data to display for selected filters.")
 
@@ -242,16 +395,16 @@ st.markdown("**Sentiment Breakdown**")
 sentiment_col1, sentiment_col2, sentiment_col3 = st.columns(3)
 
 with sentiment_col1:
-    positive = (filtered_df['rating'] >= 4).sum()
-    st.metric("Positive (4-5⭐)", positive, f"{positive/len(filtered_df)*100:.1f}%" if len(filtered_df) > 0 else "0%")
+    positive = star_totals[4] + star_totals[5]
+    st.metric("Positive (4-5⭐)", positive, f"{positive/rollup_total*100:.1f}%" if rollup_total > 0 else "0%")
 
 with sentiment_col2:
-    neutral = (filtered_df['rating'] == 3).sum()
-    st.metric("Neutral (3⭐)", neutral, f"{neutral/len(filtered_df)*100:.1f}%" if len(filtered_df) > 0 else "0%")
+    neutral = star_totals[3]
+    st.metric("Neutral (3⭐)", neutral, f"{neutral/rollup_total*100:.1f}%" if rollup_total > 0 else "0%")
 
 with sentiment_col3:
-    negative = (filtered_df['rating'] < 3).sum()
-    st.metric("Negative (1-2⭐)", negative, f"{negative/len(filtered_df)*100:.1f}%" if len(filtered_df) > 0 else "0%")
+    negative = star_totals[1] + star_totals[2]
+    st.metric("Negative (1-2⭐)", negative, f"{negative/rollup_total*100:.1f}%" if rollup_total > 0 else "0%")
 
 st.markdown("---")
 
@@ -272,6 +425,7 @@ with export_col1:
 with export_col2:
     if st.button("Clear Cache & Refresh", key="clear_cache"):
         st.cache_data.clear()
+        st.session_state.pop("sync_seq", None)
         st.success("Cache cleared! Refreshing data...")
         st.rerun()
 
@@ -318,3 +472,17 @@ st.markdown(f"""
     <p>Data auto-refreshes every 30 seconds. Use "Refresh" button to force immediate update.</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Live updates: wait for the next backend event, then rerun. Waiting in short
+# slices with a placeholder update lets widget interactions interrupt the wait.
+if live:
+    live_status = st.empty()
+    seen = st.session_state.live_version
+    waiting_since = time.time()
+    while True:
+        live_status.caption(f"Live • listening for new submissions ({datetime.now().strftime('%H:%M:%S')})")
+        if listener.wait_for_change(seen, LIVE_WAIT_SECONDS) != seen:
+            st.rerun()
+        if time.time() - waiting_since >= LIVE_RESYNC_SECONDS:
+            st.session_state.live_resync = True
+            st.rerun()
@@ -6,6 +6,7 @@ Allows customers to submit reviews and receive AI-generated responses.
 import streamlit as st
 import requests
 import json
+import time
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -61,6 +62,7 @@ if "rating" not in st.session_state:
     st.session_state.rating = 5
 
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+ENRICHMENT_WAIT_SECONDS = 60
 
 def get_star_display(rating: int) -> str:
     return "⭐" * rating + "☆" * (5 - rating)
@@ -77,6 +79,7 @@ def submit_review_to_backend(rating: int, review: str) -> dict:
         response = requests.post(
             f"{BACKEND_URL}/api/submit-review",
             json=payload,
+            params={"defer": "true"},
             timeout=10
         )
 
@@ -102,6 +105,22 @@ def submit_review_to_backend(rating: int, review: str) -> dict:
             "error": str(e)
         }
 
+def wait_for_enrichment(submission: dict) -> dict:
+    """Poll a pending submission until its AI fields are filled in or the wait expires."""
+    deadline = time.time() + ENRICHMENT_WAIT_SECONDS
+    while submission.get("status") == "pending" and time.time() < deadline:
+        time.sleep(1)
+        try:
+            response = requests.get(
+                f"{BACKEND_URL}/api/submissions/{submission['id']}",
+                timeout=5
+            )
+            if response.status_code == 200:
+                submission = response.json()
+        except requests.exceptions.RequestException:
+            pass
+    return submission
+
 st.markdown("# Share Your Feedback")
 st.markdown("---")
 st.markdown("We'd love to hear about your experience! Please share your honest review below.")
@@ -167,6 +186,9 @@ with col1:
                     review_text
                 )
 
+                if result["success"] and result["data"].get("status") == "pending":
+                    result["data"] = wait_for_enrichment(result["data"])
+
             if result["success"]:
                 st.session_state.submitted = True
                 st.session_state.ai_response = result["data"]
@@ -186,7 +208,7 @@ if st.session_state.submitted and st.session_state.ai_response:
     st.markdown("<div class='success-message'><strong>Thank you for your feedback!</strong></div>", unsafe_allow_html=True)
 
     st.markdown("### Our Response")
-    ai_resp = st.session_state.ai_response.get("ai_response", "Thank you for sharing your thoughts!")
+    ai_resp = st.session_state.ai_response.get("ai_response") or "Thank you for sharing your thoughts!"
     st.markdown(f"<div class='ai-response'>{ai_resp}</div>", unsafe_allow_html=True)
 
     with st.expander("How we'll use this feedback"):
@@ -0,0 +1,167 @@
+"""
+Background enrichment queue
+Fills in AI-generated fields for submissions that were accepted with status
+"pending". The submission log is the queue's persistence: pending records are
+re-enqueued on startup, so work survives a restart. Each submission is claimed
+with a lease in the store before it is enriched, so when several workers share
+one store only one of them spends LLM calls on it; a worker that finds a
+submission claimed looks at it again once that lease would have run out.
+"""
+
+import asyncio
+import logging
+import uuid
+from typing import Awaitable, Callable, List, Optional, Set
+
+from storage import Store
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_COMPLETE = "complete"
+STATUS_FAILED = "failed"
+
+Enricher = Callable[[dict], Awaitable[dict]]
+UpdateListener = Callable[[dict], None]
+
+
+class EnrichmentQueue:
+    """Fixed-size asyncio worker pool that enriches pending submissions with retries."""
+
+    def __init__(
+        self,
+        store: Store,
+        enrich: Enricher,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        retry_base_delay: float = 2.0,
+        on_update: Optional[UpdateListener] = None,
+        lease_seconds: float = 300.0,
+    ):
+        self.store = store
+        self.enrich = enrich
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.on_update = on_update
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start the worker pool and re-enqueue anything left pending by a previous run."""
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"enrichment-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+        records = await asyncio.to_thread(self.store.all)
+        pending = [s["id"] for s in records if s.get("status") == STATUS_PENDING]
+        for submission_id in pending:
+            self._queue.put_nowait(submission_id)
+        if pending:
+            logger.info(f"Resumed {len(pending)} pending enrichments")
+
+    async def stop(self):
+        tasks = self._workers + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._retries.clear()
+
+    def submit(self, submission_id: str):
+        """Queue a stored pending submission for enrichment."""
+        self._queue.put_nowait(submission_id)
+
+    async def _retry_later(self, submission_id: str, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(submission_id)
+
+    def _schedule(self, submission_id: str, delay: float):
+        task = asyncio.create_task(self._retry_later(submission_id, delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _claim(self, submission_id: str) -> bool:
+        """Take or renew this worker's lease on a submission."""
+        return await asyncio.to_thread(self.store.claim_enrichment, submission_id, self.owner, self.lease_seconds)
+
+    async def _worker(self):
+        while True:
+            submission_id = await self._queue.get()
+            try:
+                await self._process(submission_id)
+            except Exception as e:
+                logger.error(f"Unexpected error enriching {submission_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, submission_id: str):
+        record = await asyncio.to_thread(self.store.get, submission_id)
+        if record is None or record.get("status") != STATUS_PENDING:
+            return
+        if not await self._claim(submission_id):
+            # Another worker is enriching it; check again once its lease would have expired.
+            self._schedule(submission_id, self.lease_seconds)
+            return
+
+        retrying = False
+        try:
+            # Re-read under the lease: another worker may have finished it just before the claim.
+            record = await asyncio.to_thread(self.store.get, submission_id)
+            if record is not None and record.get("status") == STATUS_PENDING:
+                retrying = await self._enrich(submission_id, record)
+        finally:
+            # A scheduled retry keeps the lease, so no other worker picks the submission up in between.
+            if not retrying:
+                await asyncio.to_thread(self.store.release_enrichment, submission_id, self.owner)
+
+    async def _enrich(self, submission_id: str, record: dict) -> bool:
+        """Enrich a claimed submission; returns True if a retry was scheduled."""
+        try:
+            fields = await self.enrich(record)
+        except Exception as e:
+            attempts = record.get("enrichment_attempts", 0) + 1
+            current = await asyncio.to_thread(self.store.get, submission_id)
+            if current is None:
+                return False
+            updated = {**current, "enrichment_attempts": attempts, "enrichment_error": str(e)}
+            if attempts >= self.max_retries:
+                updated["status"] = STATUS_FAILED
+                logger.error(f"Enrichment failed for {submission_id} after {attempts} attempts: {e}")
+            await asyncio.to_thread(self.store.put, updated)
+            self._notify(updated)
+
+            if attempts < self.max_retries:
+                delay = self.retry_base_delay * 2 ** (attempts - 1)
+                logger.warning(f"Enrichment attempt {attempts} failed for {submission_id}, retrying in {delay}s")
+                self._schedule(submission_id, delay)
+                return True
+            return False
+
+        # The submission may have been deleted while the LLM calls were in flight.
+        current = await asyncio.to_thread(self.store.get, submission_id)
+        if current is None:
+            return False
+        if not await self._claim(submission_id):
+            logger.warning(f"Lease on {submission_id} expired during enrichment; discarding result")
+            return False
+        updated = {**current, **fields, "status": STATUS_COMPLETE}
+        updated.pop("enrichment_error", None)
+        await asyncio.to_thread(self.store.put, updated)
+        self._notify(updated)
+        logger.info(f"Enrichment complete: {submission_id}")
+        return False
+
+    def _notify(self, record: dict):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(record)
+        except Exception as e:
+            logger.error(f"Enrichment update listener failed for {record['id']}: {e}")
@@ -0,0 +1,78 @@
+"""
+Live event fan-out
+In-process publish/subscribe for submission and enrichment events. Each
+subscriber gets a bounded asyncio.Queue, so one slow consumer can never hold up
+publishers or other subscribers: when its queue is full it either loses its
+oldest events or is disconnected, depending on the broker's policy.
+
+The broker lives in one process. When several uvicorn workers share a SQLite
+store, a subscriber only hears about writes made by the worker serving its
+stream; other workers' writes reach it only through GET /api/changes.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+POLICY_DROP = "drop"
+POLICY_DISCONNECT = "disconnect"
+
+
+class Subscription:
+    """One subscriber's bounded queue plus its backpressure bookkeeping."""
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+
+    async def next(self, timeout: float) -> Optional[dict]:
+        """Wait up to `timeout` seconds for the next event; None on timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Fans events out to every current subscriber without ever blocking the publisher."""
+
+    def __init__(self, max_queue: int = 100, policy: str = POLICY_DROP):
+        if policy not in (POLICY_DROP, POLICY_DISCONNECT):
+            raise ValueError(f"Unknown slow-subscriber policy: {policy}")
+        self.max_queue = max_queue
+        self.policy = policy
+        self._subscribers: Set[Subscription] = set()
+        self._next_id = 0
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def publish(self, event_type: str, data: dict):
+        """Deliver an event to all subscribers; must be called from the event loop thread."""
+        self._next_id += 1
+        event = {"id": self._next_id, "event": event_type, "data": data}
+        for subscription in list(self._subscribers):
+            if subscription.queue.full():
+                if self.policy == POLICY_DISCONNECT:
+                    logger.warning("Disconnecting slow event subscriber")
+                    subscription.closed = True
+                    self._subscribers.discard(subscription)
+                    continue
+                subscription.queue.get_nowait()
+                subscription.dropped += 1
+            subscription.queue.put_nowait(event)
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event as a Server-Sent Events message."""
+    message = f"id: {event['id']}\n" if "id" in event else ""
+    return message + f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
@@ -0,0 +1,186 @@
+"""
+LLM response cache
+Content-addressed cache for generations: an in-process LRU tier with TTL,
+backed by an optional SQLite tier that survives restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_REPEATED_PUNCTUATION = re.compile(r"([!?.])\1+")
+
+
+def normalize_review(review: str) -> str:
+    """Fold case, whitespace and repeated punctuation so near-identical reviews share a key."""
+    text = _WHITESPACE.sub(" ", review.casefold()).strip()
+    return _REPEATED_PUNCTUATION.sub(r"\1", text)
+
+
+def cache_key(template: str, model: str, rating: Optional[int], review: str, temperature: float) -> str:
+    """
+    Hash the inputs that determine a generation.
+
+    `template` is the prompt template text itself, so editing a prompt
+    invalidates its cached generations instead of serving stale ones.
+    """
+    payload = json.dumps(
+        [template, model, rating, normalize_review(review), round(temperature, 3)],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier (memory LRU + optional SQLite) cache with TTL and size-bounded eviction."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 86400,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 100000,
+        touch_batch_size: int = 100,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.touch_batch_size = touch_batch_size
+
+        # _lock guards the memory tier and counters; _db_lock serializes the SQLite
+        # connection, so a slow disk read or commit never blocks memory hits.
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_writes = 0
+        self._touched: Dict[str, float] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+            self._db.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    async def aget(self, key: str) -> Optional[str]:
+        """Look up the memory tier inline and the SQLite tier in a worker thread."""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._get_disk, key, now)
+        return self._record(value)
+
+    async def aset(self, key: str, value: str):
+        """Store in the memory tier inline and write the SQLite tier in a worker thread."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, value, now)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry[0], now):
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry[1]
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                return None
+            # Access times are written in batches rather than with a commit per hit.
+            self._touched[key] = now
+            if len(self._touched) >= self.touch_batch_size:
+                self._flush_touched()
+                self._db.commit()
+        with self._lock:
+            self._remember(key, row[1], row[0])
+            self.disk_hits += 1
+        return row[0]
+
+    def _set_disk(self, key: str, value: str, now: float):
+        with self._db_lock:
+            self._flush_touched()
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._disk_writes += 1
+            if self._disk_writes % 100 == 0:
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _record(self, value: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _remember(self, key: str, created_at: float, value: str):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self, now: float):
+        if self.ttl_seconds > 0:
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "disk_enabled": self._db is not None,
+            }
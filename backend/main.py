@@ -3,16 +3,22 @@ Feedback System Backend API
 FastAPI application for handling customer review submissions and admin analytics.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
-import json
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, List, Optional, Set
 import os
+import json
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 import logging
-from openai import OpenAI
+from openai import AsyncOpenAI
+from storage import create_store
+from llm_cache import LLMCache, cache_key
+from enrichment import EnrichmentQueue, STATUS_COMPLETE, STATUS_PENDING
+from events import EventBroker, format_sse
 
 load_dotenv()
 
@@ -22,20 +28,76 @@ logger = logging.getLogger(__name__)
 # Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 DATA_FILE = "/tmp/submissions.json"
+LOG_FILE = os.getenv("SUBMISSIONS_LOG", "/tmp/submissions.jsonl")
+SQLITE_FILE = os.getenv("SUBMISSIONS_DB", "/tmp/submissions.db")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "log")  # "log" or "sqlite"
+
+store = create_store(STORAGE_BACKEND, LOG_FILE, SQLITE_FILE)
+store.import_legacy(DATA_FILE)
+
+LLM_MODEL = "google/gemini-2.0-flash-exp:free"
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+GENERATION_MODE = os.getenv("GENERATION_MODE", "separate")  # "separate" or "combined"
+ENRICHMENT_MODE = os.getenv("ENRICHMENT_MODE", "sync")  # "sync" or "deferred"
+ENRICHMENT_CONCURRENCY = int(os.getenv("ENRICHMENT_CONCURRENCY", "4"))
+ENRICHMENT_MAX_RETRIES = int(os.getenv("ENRICHMENT_MAX_RETRIES", "3"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")  # e.g. /tmp/llm_cache.db; unset keeps the cache in memory only
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+EVENT_SLOW_POLICY = os.getenv("EVENT_SLOW_POLICY", "drop")  # "drop" oldest events or "disconnect" the subscriber
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+event_broker = EventBroker(max_queue=EVENT_QUEUE_SIZE, policy=EVENT_SLOW_POLICY)
+
+llm_cache = LLMCache(max_entries=LLM_CACHE_SIZE, ttl_seconds=LLM_CACHE_TTL, db_path=LLM_CACHE_DB)
 
 openai_client = None
+llm_semaphore = None
 
 def get_openai_client():
     global openai_client
     if openai_client is None:
         if not OPENROUTER_API_KEY:
             raise RuntimeError("OPENROUTER_API_KEY not set")
-        openai_client = OpenAI(
+        openai_client = AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=OPENROUTER_API_KEY,
         )
     return openai_client
 
+async def complete(prompt: str, temperature: float, key: Optional[str] = None) -> str:
+    """
+    Run a single chat completion, bounded by LLM_CONCURRENCY in-flight calls.
+    
+    When a cache key is given, cached output is returned without calling upstream
+    and successful output is cached.
+    """
+    global llm_semaphore
+    if key is not None:
+        cached = await llm_cache.aget(key)
+        if cached is not None:
+            return cached
+    
+    if llm_semaphore is None:
+        llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    
+    client = get_openai_client()
+    async with llm_semaphore:
+        response = await client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature
+        )
+    text = response.choices[0].message.content.strip()
+    
+    if key is not None:
+        await llm_cache.aset(key, text)
+    return text
+
 # Data Models
 class ReviewSubmission(BaseModel):
     rating: int
@@ -65,93 +127,217 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-def load_submissions() -> List[dict]:
-    """Load all submissions from persistent storage."""
-    if not os.path.exists(DATA_FILE):
-        return []
-    
-    try:
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading submissions: {e}")
-        return []
-
-def save_submissions(submissions: List[dict]):
-    """Save submissions to persistent storage."""
-    try:
-        with open(DATA_FILE, 'w') as f:
-            json.dump(submissions, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving submissions: {e}")
-
 def generate_id() -> str:
     """Generate unique submission identifier."""
     import uuid
     return f"sub_{uuid.uuid4().hex[:8]}"
 
-def generate_ai_response(review: str, rating: int) -> str:
-    """Generate customer-facing response using LLM."""
-    prompt = f"""A customer left this {rating}-star review:
+def validate_submission(submission: ReviewSubmission) -> Optional[str]:
+    """Return a validation error message, or None if the submission is acceptable."""
+    if not submission.review or len(submission.review) < 5:
+        return "Review must be at least 5 characters"
+    if not 1 <= submission.rating <= 5:
+        return "Rating must be between 1 and 5"
+    return None
+
+def describe_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic error into "field: message" pairs for per-item batch results."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()
+    )
+
+def build_record(submission: ReviewSubmission, ai_fields: dict, pending: bool) -> dict:
+    """Assemble the stored record for a submission."""
+    return {
+        "id": generate_id(),
+        "rating": submission.rating,
+        "review": submission.review,
+        "ai_response": ai_fields["ai_response"],
+        "ai_summary": ai_fields["ai_summary"],
+        "recommended_actions": ai_fields["recommended_actions"],
+        "timestamp": submission.timestamp,
+        "user_id": submission.user_id,
+        "status": STATUS_PENDING if pending else STATUS_COMPLETE
+    }
+
+# Prompt templates; the template text is part of each cache key, so editing one invalidates its cached output.
+AI_RESPONSE_PROMPT = """A customer left this {rating}-star review:
 "{review}"
 
 Respond warmly and professionally in 50-80 words, acknowledging their feedback and addressing their main concerns.
 
 Response:"""
+
+AI_SUMMARY_PROMPT = """Summarize this review in one concise sentence (max 15 words):
+"{review}"
+
+Summary:"""
+
+RECOMMENDED_ACTIONS_PROMPT = """For a {rating}-star review mentioning:
+"{review}"
+
+What should the business do? Provide 1-2 specific, actionable recommendations.
+
+Actions:"""
+
+COMBINED_PROMPT = """A customer left this {rating}-star review:
+"{review}"
+
+Produce three things:
+1. ai_response: a warm, professional reply to the customer in 50-80 words, acknowledging their feedback and addressing their main concerns.
+2. ai_summary: one concise sentence (max 15 words) summarizing the review for an admin dashboard.
+3. recommended_actions: 1-2 specific, actionable recommendations for the business.
+
+Respond ONLY with valid JSON in this exact format:
+{{"ai_response": "<text>", "ai_summary": "<text>", "recommended_actions": "<text>"}}"""
+
+async def generate_ai_response(review: str, rating: int, strict: bool = False) -> str:
+    """Generate customer-facing response using LLM."""
+    prompt = AI_RESPONSE_PROMPT.format(rating=rating, review=review)
     
     try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model="google/gemini-2.0-flash-exp:free",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        key = cache_key(AI_RESPONSE_PROMPT, LLM_MODEL, rating, review, 0.7)
+        return await complete(prompt, temperature=0.7, key=key)
     except Exception as e:
         logger.error(f"Error generating response: {e}")
+        if strict:
+            raise
         return "Thank you for your feedback! We appreciate your input."
 
-def generate_ai_summary(review: str) -> str:
+async def generate_ai_summary(review: str, strict: bool = False) -> str:
     """Generate concise summary of review for admin dashboard."""
-    prompt = f"""Summarize this review in one concise sentence (max 15 words):
-"{review}"
-
-Summary:"""
+    prompt = AI_SUMMARY_PROMPT.format(review=review)
     
     try:
-        client = get_openai_client()
-        response = client.chat.completions.create(
-            model="google/gemini-2.0-flash-exp:free",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5
-        )
-        return response.choices[0].message.content.strip()
+        key = cache_key(AI_SUMMARY_PROMPT, LLM_MODEL, None, review, 0.5)
+        return await complete(prompt, temperature=0.5, key=key)
     except Exception as e:
         logger.error(f"Error generating summary: {e}")
+        if strict:
+            raise
         return review[:50] + "..."
 
-def generate_recommended_actions(review: str, rating: int) -> str:
+async def generate_recommended_actions(review: str, rating: int, strict: bool = False) -> str:
     """Generate actionable recommendations for business based on review."""
-    prompt = f"""For a {rating}-star review mentioning:
-"{review}"
-
-What should the business do? Provide 1-2 specific, actionable recommendations.
-
-Actions:"""
+    prompt = RECOMMENDED_ACTIONS_PROMPT.format(rating=rating, review=review)
     
     try:
-        response = openai_client.chat.completions.create(
-            model="google/gemini-2.0-flash-exp:free",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        key = cache_key(RECOMMENDED_ACTIONS_PROMPT, LLM_MODEL, rating, review, 0.7)
+        return await complete(prompt, temperature=0.7, key=key)
     except Exception as e:
         logger.error(f"Error generating actions: {e}")
+        if strict:
+            raise
         return "Review and investigate customer feedback" if rating < 3 else "Maintain current service level"
 
+AI_FIELDS = ("ai_response", "ai_summary", "recommended_actions")
+
+def parse_combined_output(text: str) -> dict:
+    """Extract the first JSON object from a combined generation, skipping code fences and chatter."""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return {}
+
+async def generate_combined(review: str, rating: int) -> dict:
+    """Generate response, summary and actions in a single LLM call."""
+    prompt = COMBINED_PROMPT.format(rating=rating, review=review)
+    
+    # Cached here rather than in complete(), and only once the output parses into every field.
+    key = cache_key(COMBINED_PROMPT, LLM_MODEL, rating, review, 0.7)
+    try:
+        text = await llm_cache.aget(key)
+        cached = text is not None
+        if not cached:
+            text = await complete(prompt, temperature=0.7)
+        parsed = parse_combined_output(text)
+    except Exception as e:
+        logger.error(f"Error generating combined output: {e}")
+        return {}
+    
+    candidates = {}
+    for field in AI_FIELDS:
+        value = parsed.get(field)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            value = "\n".join(value)
+        if value is not None:
+            candidates[field] = value
+    
+    # Validate the raw values against the response model; numbers, objects and other
+    # non-text values it rejects go back to the per-field path.
+    try:
+        AIResponse(id="", rating=rating, review=review, timestamp="", **candidates)
+    except ValidationError as e:
+        for error in e.errors():
+            if error["loc"] and error["loc"][0] in candidates:
+                candidates.pop(error["loc"][0], None)
+    fields = {field: value.strip() for field, value in candidates.items() if value.strip()}
+    if not cached and len(fields) == len(AI_FIELDS):
+        await llm_cache.aset(key, text)
+    return fields
+
+async def generate_ai_fields(review: str, rating: int, strict: bool = False) -> dict:
+    """
+    Generate all AI fields for a review according to GENERATION_MODE.
+    
+    With strict=True, upstream failures are raised instead of replaced by canned text.
+    """
+    fields = {}
+    if GENERATION_MODE == "combined":
+        fields = await generate_combined(review, rating)
+    
+    fallbacks = {
+        "ai_response": lambda: generate_ai_response(review, rating, strict),
+        "ai_summary": lambda: generate_ai_summary(review, strict),
+        "recommended_actions": lambda: generate_recommended_actions(review, rating, strict),
+    }
+    missing = [field for field in AI_FIELDS if field not in fields]
+    if missing:
+        if GENERATION_MODE == "combined":
+            logger.warning(f"Combined generation missing {missing}, falling back to separate calls")
+        results = await asyncio.gather(*(fallbacks[field]() for field in missing))
+        fields.update(zip(missing, results))
+    return fields
+
+async def enrich_submission(record: dict) -> dict:
+    """Generate AI fields for a stored pending submission, raising on upstream failure."""
+    return await generate_ai_fields(record["review"], record["rating"], strict=True)
+
+def publish_submission_event(event_type: str, record: dict):
+    """Announce a stored submission to live subscribers; clients fetch full rows via /api/changes."""
+    event_broker.publish(event_type, {
+        "id": record["id"],
+        "rating": record.get("rating"),
+        "timestamp": record.get("timestamp"),
+        "status": record.get("status"),
+    })
+
+enrichment_queue = EnrichmentQueue(
+    store,
+    enrich_submission,
+    concurrency=ENRICHMENT_CONCURRENCY,
+    max_retries=ENRICHMENT_MAX_RETRIES,
+    on_update=lambda record: publish_submission_event("enrichment", record),
+)
+
+@app.on_event("startup")
+async def start_enrichment_queue():
+    await enrichment_queue.start()
+
+@app.on_event("shutdown")
+async def stop_enrichment_queue():
+    await enrichment_queue.stop()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring."""
@@ -160,45 +346,46 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """LLM response cache hit/miss counters."""
+    return llm_cache.stats()
+
 @app.post("/api/submit-review")
-async def submit_review(submission: ReviewSubmission):
+async def submit_review(submission: ReviewSubmission, defer: Optional[bool] = None):
     """
     Process new review submission with AI-generated responses.
     
     Args:
         submission: Review data including rating and text
+        defer: Store immediately with status "pending" and enrich in the background
+            (defaults to ENRICHMENT_MODE)
         
     Returns:
-        Complete submission record with AI-generated content
+        Submission record; AI fields are empty until status is "complete"
     """
     try:
-        if not submission.review or len(submission.review) < 5:
-            raise HTTPException(status_code=400, detail="Review must be at least 5 characters")
+        error = validate_submission(submission)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
         
-        if not 1 <= submission.rating <= 5:
-            raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+        if defer is None:
+            defer = ENRICHMENT_MODE == "deferred"
         
-        logger.info(f"Generating AI responses for review: {submission.review[:50]}...")
+        if defer:
+            ai_fields = {field: "" for field in AI_FIELDS}
+        else:
+            logger.info(f"Generating AI responses for review: {submission.review[:50]}...")
+            ai_fields = await generate_ai_fields(submission.review, submission.rating)
         
-        ai_response = generate_ai_response(submission.review, submission.rating)
-        ai_summary = generate_ai_summary(submission.review)
-        recommended_actions = generate_recommended_actions(submission.review, submission.rating)
+        submission_record = build_record(submission, ai_fields, defer)
+        submission_id = submission_record["id"]
         
-        submission_id = generate_id()
-        submission_record = {
-            "id": submission_id,
-            "rating": submission.rating,
-            "review": submission.review,
-            "ai_response": ai_response,
-            "ai_summary": ai_summary,
-            "recommended_actions": recommended_actions,
-            "timestamp": submission.timestamp,
-            "user_id": submission.user_id
-        }
+        await asyncio.to_thread(store.put, submission_record)
+        publish_submission_event("submission", submission_record)
         
-        submissions = load_submissions()
-        submissions.append(submission_record)
-        save_submissions(submissions)
+        if defer:
+            enrichment_queue.submit(submission_id)
         
         logger.info(f"Submission saved: {submission_id}")
         
@@ -210,29 +397,193 @@ async def submit_review(submission: ReviewSubmission):
         logger.error(f"Error processing submission: {e}")
         raise HTTPException(status_code=500, detail="Error processing submission")
 
+# Batches still being generated or persisted; held so they finish even if the client goes away.
+batch_tasks: Set[asyncio.Task] = set()
+
+@app.post("/api/submit-reviews/batch")
+async def submit_reviews_batch(
+    submissions: List[Any] = Body(...),
+    defer: Optional[bool] = None,
+    stream: bool = False,
+):
+    """
+    Ingest many reviews at once.
+    
+    Items are validated individually, so a malformed item comes back as a
+    per-item error instead of failing the whole batch. Valid items are
+    generated with at most BATCH_CONCURRENCY reviews in flight, and all valid
+    records are persisted in a single write. Generation and persistence run
+    in a background task, so a streaming client that disconnects early does
+    not lose the batch.
+    
+    Args:
+        submissions: List of review submission objects
+        defer: Store as "pending" and enrich in the background (defaults to ENRICHMENT_MODE)
+        stream: Return NDJSON lines as each item finishes, followed by a final
+            {"done": true, ...} line once the batch has been persisted
+    
+    Returns:
+        {"results": [...], "persisted": n} with one {"index", "ok", "submission"|"error"} per item
+    """
+    if len(submissions) > BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size must not exceed {BATCH_MAX_SIZE}")
+    
+    if defer is None:
+        defer = ENRICHMENT_MODE == "deferred"
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def process(index: int, item: Any) -> dict:
+        try:
+            submission = ReviewSubmission.model_validate(item)
+        except ValidationError as e:
+            return {"index": index, "ok": False, "error": describe_validation_error(e)}
+        error = validate_submission(submission)
+        if error:
+            return {"index": index, "ok": False, "error": error}
+        
+        if defer:
+            ai_fields = {field: "" for field in AI_FIELDS}
+        else:
+            async with semaphore:
+                ai_fields = await generate_ai_fields(submission.review, submission.rating)
+        return {"index": index, "ok": True, "submission": build_record(submission, ai_fields, defer)}
+    
+    async def persist(results: List[dict]) -> int:
+        records = [r["submission"] for r in results if r["ok"]]
+        if records:
+            await asyncio.to_thread(store.put_many, records)
+            for record in records:
+                publish_submission_event("submission", record)
+            if defer:
+                for record in records:
+                    enrichment_queue.submit(record["id"])
+        logger.info(f"Batch saved: {len(records)} of {len(results)} submissions")
+        return len(records)
+    
+    tasks = [asyncio.create_task(process(i, s)) for i, s in enumerate(submissions)]
+    
+    async def run() -> tuple:
+        """Wait for every item, then persist; returns (results, persisted or None on a save error)."""
+        results = await asyncio.gather(*tasks)
+        try:
+            return results, await persist(results)
+        except Exception as e:
+            logger.error(f"Error saving batch: {e}")
+            return results, None
+    
+    batch = asyncio.create_task(run())
+    batch_tasks.add(batch)
+    batch.add_done_callback(batch_tasks.discard)
+    
+    if stream:
+        async def lines():
+            for task in asyncio.as_completed(tasks):
+                yield json.dumps(await task) + "\n"
+            # Shielded: closing this generator on disconnect must not cancel the save.
+            _, persisted = await asyncio.shield(batch)
+            if persisted is None:
+                yield json.dumps({"done": True, "persisted": 0, "error": "Error saving batch"}) + "\n"
+            else:
+                yield json.dumps({"done": True, "persisted": persisted}) + "\n"
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    try:
+        results, persisted = await asyncio.shield(batch)
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        raise HTTPException(status_code=500, detail="Error processing batch")
+    if persisted is None:
+        raise HTTPException(status_code=500, detail="Error processing batch")
+    return {"results": results, "persisted": persisted}
+
+def parse_timestamp_bound(value: Optional[str], name: str) -> Optional[str]:
+    """Validate an ISO 8601 date or datetime query bound; it is compared as a string prefix."""
+    if not value:
+        return None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be an ISO 8601 date or datetime")
+    return value
+
+def project_fields(submissions: List[dict], fields: Optional[str]) -> List[dict]:
+    """Keep only the comma-separated `fields` of each submission, if given."""
+    if not fields:
+        return submissions
+    projection = [f.strip() for f in fields.split(",") if f.strip()]
+    return [{f: s[f] for f in projection if f in s} for s in submissions]
+
+def parse_rating_in(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma-separated rating list such as "4,5"."""
+    if not value:
+        return None
+    try:
+        ratings = [int(r) for r in value.split(",") if r.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="rating_in must be comma-separated integers")
+    if not all(1 <= r <= 5 for r in ratings):
+        raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+    return ratings
+
 @app.get("/api/submissions")
-async def get_submissions(rating: Optional[int] = None, limit: Optional[int] = None):
+async def get_submissions(
+    response: Response,
+    rating: Optional[int] = None,
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    rating_in: Optional[str] = None,
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    q: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
-    Retrieve submissions with optional filtering.
+    Retrieve submissions newest first with optional filtering and keyset pagination.
     
     Query Parameters:
         rating: Filter by specific rating (1-5)
+        rating_in: Comma-separated ratings to include, e.g. "4,5"
+        from: Earliest timestamp to include (ISO 8601, inclusive)
+        to: Timestamp to stop before (ISO 8601, exclusive)
+        q: Case-insensitive keyword the review must contain
+        fields: Comma-separated fields to return per submission, e.g. "id,rating,review"
         limit: Maximum number of results to return
+        after: Cursor "<timestamp>,<id>" of the last row of the previous page
+    
+    When more rows may follow, the cursor for the next page is returned in the
+    X-Next-Cursor response header.
     """
     try:
-        submissions = load_submissions()
+        if rating and not 1 <= rating <= 5:
+            raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
         
-        if rating:
-            if not 1 <= rating <= 5:
-                raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
-            submissions = [s for s in submissions if s['rating'] == rating]
+        ratings = parse_rating_in(rating_in)
         
-        submissions.sort(key=lambda x: x['timestamp'], reverse=True)
+        cursor = None
+        if after:
+            timestamp, sep, submission_id = after.rpartition(",")
+            if not sep:
+                raise HTTPException(status_code=400, detail="Cursor must be '<timestamp>,<id>'")
+            cursor = (timestamp, submission_id)
         
-        if limit:
-            submissions = submissions[:limit]
+        submissions = await asyncio.to_thread(
+            store.page,
+            rating=rating or None,
+            ratings=ratings,
+            since=parse_timestamp_bound(from_, "from"),
+            until=parse_timestamp_bound(to, "to"),
+            q=q or None,
+            after=cursor,
+            limit=limit,
+        )
         
-        return submissions
+        if limit and len(submissions) == limit:
+            last = submissions[-1]
+            response.headers["X-Next-Cursor"] = f"{last['timestamp']},{last['id']}"
+        
+        return project_fields(submissions, fields)
     
     except HTTPException:
         raise
@@ -240,12 +591,107 @@ async def get_submissions(rating: Optional[int] = None, limit: Optional[int] = N
         logger.error(f"Error retrieving submissions: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving submissions")
 
+@app.get("/api/events")
+async def stream_events(request: Request):
+    """
+    Server-Sent Events stream of "submission", "enrichment" and "deletion" events.
+    
+    Each subscriber has a bounded queue. A subscriber that falls behind either
+    loses its oldest events, which is reported with a "dropped" event, or is
+    disconnected, depending on EVENT_SLOW_POLICY. In both cases it should
+    catch up through GET /api/changes. A comment line is sent as a heartbeat
+    while idle.
+    
+    Events are per worker process: with several workers on a shared SQLite
+    store, a stream only carries writes handled by the worker serving it, so
+    clients should still poll GET /api/changes periodically to pick up the rest.
+    """
+    subscription = event_broker.subscribe()
+    
+    async def messages():
+        try:
+            yield ": connected\n\n"
+            while not subscription.closed:
+                event = await subscription.next(EVENT_HEARTBEAT_SECONDS)
+                if subscription.dropped:
+                    yield format_sse({"event": "dropped", "data": {"count": subscription.dropped}})
+                    subscription.dropped = 0
+                if event is not None:
+                    yield format_sse(event)
+                elif await request.is_disconnected():
+                    break
+                else:
+                    yield ": keepalive\n\n"
+            if subscription.closed:
+                yield format_sse({"event": "overflow", "data": {"reason": "subscriber too slow"}})
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/changes")
+async def get_changes(since: int = 0, fields: Optional[str] = None):
+    """
+    Delta sync: submissions inserted or updated, and ids deleted, after change sequence `since`.
+    
+    Clients store the returned "seq" and pass it back as `since` on the next
+    call. When `since` is 0 or older than the store's retained history,
+    "reset" is true and "upserts" holds every live submission, which replaces
+    the client's copy. `fields` projects the upserted submissions.
+    """
+    try:
+        changes = await asyncio.to_thread(store.changes, since)
+        changes["upserts"] = project_fields(changes["upserts"], fields)
+        return changes
+    
+    except Exception as e:
+        logger.error(f"Error retrieving changes: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving changes")
+
+@app.get("/api/search")
+async def search_submissions(
+    q: str,
+    limit: int = 20,
+    rating_in: Optional[str] = None,
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+):
+    """
+    Full-text search over review and AI summary text, best match first.
+    
+    Query terms match as prefixes and results are ranked by BM25; each result
+    carries its relevance in a "score" field. rating_in/from/to filter the
+    matches the same way as GET /api/submissions.
+    """
+    try:
+        if not 1 <= limit <= 1000:
+            raise HTTPException(status_code=400, detail="Limit must be between 1 and 1000")
+        
+        results = await asyncio.to_thread(
+            store.search,
+            q,
+            limit=limit,
+            ratings=parse_rating_in(rating_in),
+            since=parse_timestamp_bound(from_, "from"),
+            until=parse_timestamp_bound(to, "to"),
+        )
+        return [{**record, "score": round(score, 4)} for record, score in results]
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching submissions: {e}")
+        raise HTTPException(status_code=500, detail="Error searching submissions")
+
 @app.get("/api/submissions/{submission_id}")
 async def get_submission(submission_id: str):
     """Retrieve specific submission by ID."""
     try:
-        submissions = load_submissions()
-        submission = next((s for s in submissions if s['id'] == submission_id), None)
+        submission = await asyncio.to_thread(store.get, submission_id)
         
         if not submission:
             raise HTTPException(status_code=404, detail="Submission not found")
@@ -260,28 +706,36 @@ async def get_submission(submission_id: str):
 
 @app.get("/api/analytics")
 async def get_analytics():
-    """Calculate aggregate analytics from all submissions."""
+    """Report aggregate analytics from the store's running counters."""
     try:
-        submissions = load_submissions()
+        stats = await asyncio.to_thread(store.stats)
+        total = stats["total"]
+        histogram = stats["histogram"]
         
-        if not submissions:
+        if not total:
             return {
                 "total_submissions": 0,
                 "avg_rating": 0,
-                "rating_distribution": {}
+                "rating_distribution": {},
+                "windows": {}
             }
         
-        ratings = [s['rating'] for s in submissions]
-        
         return {
-            "total_submissions": len(submissions),
-            "avg_rating": round(sum(ratings) / len(ratings), 2),
+            "total_submissions": total,
+            "avg_rating": round(stats["rating_sum"] / total, 2),
             "rating_distribution": {
-                "5_stars": ratings.count(5),
-                "4_stars": ratings.count(4),
-                "3_stars": ratings.count(3),
-                "2_stars": ratings.count(2),
-                "1_star": ratings.count(1)
+                "5_stars": histogram.get(5, 0),
+                "4_stars": histogram.get(4, 0),
+                "3_stars": histogram.get(3, 0),
+                "2_stars": histogram.get(2, 0),
+                "1_star": histogram.get(1, 0)
+            },
+            "windows": {
+                name: {
+                    "count": window["count"],
+                    "avg_rating": round(window["rating_sum"] / window["count"], 2) if window["count"] else 0
+                }
+                for name, window in stats["windows"].items()
             }
         }
     
@@ -289,16 +743,67 @@ async def get_analytics():
         logger.error(f"Error calculating analytics: {e}")
         raise HTTPException(status_code=500, detail="Error calculating analytics")
 
+@app.get("/api/analytics/timeseries")
+async def get_analytics_timeseries(
+    bucket: str = "day",
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+):
+    """
+    Hourly or daily rollups (count, average rating and per-star histogram).
+    
+    Query Parameters:
+        bucket: "hour" or "day"
+        from: Earliest timestamp to include (ISO 8601); its bucket is included
+        to: Timestamp to stop before (ISO 8601, exclusive)
+    
+    Points come from the store's maintained rollups, oldest first, so the cost
+    depends on the number of buckets and not on the number of submissions.
+    """
+    try:
+        if bucket not in ("hour", "day"):
+            raise HTTPException(status_code=400, detail="Bucket must be 'hour' or 'day'")
+        
+        points = await asyncio.to_thread(
+            store.timeseries,
+            bucket,
+            since=parse_timestamp_bound(from_, "from"),
+            until=parse_timestamp_bound(to, "to"),
+        )
+        return {
+            "bucket": bucket,
+            "points": [
+                {
+                    "bucket": point["bucket"],
+                    "count": point["count"],
+                    "avg_rating": round(point["rating_sum"] / point["count"], 2) if point["count"] else 0,
+                    "histogram": point["histogram"],
+                }
+                for point in points
+            ]
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculating timeseries: {e}")
+        raise HTTPException(status_code=500, detail="Error calculating timeseries")
+
 @app.delete("/api/submissions/{submission_id}")
 async def delete_submission(submission_id: str):
     """Delete specific submission by ID."""
     try:
-        submissions = load_submissions()
-        submissions = [s for s in submissions if s['id'] != submission_id]
-        save_submissions(submissions)
+        deleted = await asyncio.to_thread(store.delete, submission_id)
+        
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Submission not found")
+        
+        event_broker.publish("deletion", {"id": submission_id})
         
         return {"status": "deleted", "id": submission_id}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting submission: {e}")
         raise HTTPException(status_code=500, detail="Error deleting submission")
@@ -312,9 +817,15 @@ async def root():
         "endpoints": {
             "health": "/health",
             "submit_review": "POST /api/submit-review",
+            "submit_reviews_batch": "POST /api/submit-reviews/batch",
             "get_submissions": "GET /api/submissions",
             "get_submission": "GET /api/submissions/{submission_id}",
+            "search": "GET /api/search?q=",
+            "changes": "GET /api/changes?since=",
+            "events": "GET /api/events",
             "get_analytics": "GET /api/analytics",
+            "analytics_timeseries": "GET /api/analytics/timeseries?bucket=hour|day",
+            "cache_stats": "GET /api/cache/stats",
             "delete_submission": "DELETE /api/submissions/{submission_id}"
         }
     }
@@ -0,0 +1,97 @@
+"""
+Full-text search
+In-memory inverted index over submission review and AI summary text. Posting
+lists map each term to {submission id: term frequency}, a sorted term list
+serves prefix lookups by bisection, and results are ranked with BM25.
+"""
+
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SEARCH_FIELDS = ("review", "ai_summary")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def document_tokens(record: dict) -> List[str]:
+    return [token for field in SEARCH_FIELDS for token in tokenize(record.get(field) or "")]
+
+
+class InvertedIndex:
+    """Incrementally maintained BM25 index keyed by submission id."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_expansions: int = 50):
+        self.k1 = k1
+        self.b = b
+        self.max_expansions = max_expansions
+
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: List[str] = []
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, record: dict):
+        """Index a submission, replacing any previous version with the same id."""
+        doc_id = record["id"]
+        self.remove(doc_id)
+        tokens = document_tokens(record)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, tf in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[doc_id] = tf
+        self._doc_terms[doc_id] = list(counts)
+        self._doc_lengths[doc_id] = len(tokens)
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        length = self._doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def expand(self, prefix: str) -> List[str]:
+        """Indexed terms starting with `prefix`, found by bisecting the sorted term list."""
+        start = bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:start + self.max_expansions]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Return (submission id, BM25 score) pairs, best first; query terms match as prefixes."""
+        n = len(self._doc_lengths)
+        if not n:
+            return []
+        avg_length = self._total_length / n or 1
+        scores: Dict[str, float] = {}
+        for token in set(tokenize(query)):
+            for term in self.expand(token):
+                postings = self._postings[term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,963 @@
+"""
+Submission storage backends
+SubmissionStore keeps every submission as one JSON line in a log file, with
+deletes written as tombstones, and holds the live set in memory so reads never
+touch the disk. SQLiteSubmissionStore offers the same interface on a WAL-mode
+SQLite database for deployments running several workers.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from search import InvertedIndex, tokenize
+
+logger = logging.getLogger(__name__)
+
+OP_PUT = "put"
+OP_DELETE = "del"
+OP_META = "meta"
+
+SortKey = Tuple[str, str]
+
+RATINGS = (1, 2, 3, 4, 5)
+BUCKET_LENGTHS = {"day": 10, "hour": 13}  # timestamp prefix lengths: "YYYY-MM-DD" and "YYYY-MM-DDTHH"
+
+
+def sort_key(record: dict) -> SortKey:
+    return (record.get("timestamp", ""), record["id"])
+
+
+def matches_keyword(record: dict, q: str) -> bool:
+    return q.lower() in (record.get("review") or "").lower()
+
+
+def rollup_point(bucket: str, counts: List[int]) -> dict:
+    return {
+        "bucket": bucket,
+        "count": counts[0],
+        "rating_sum": counts[1],
+        "histogram": dict(zip(RATINGS, counts[2:])),
+    }
+
+
+def matches_filters(
+    record: dict,
+    ratings: Optional[Iterable[int]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+) -> bool:
+    timestamp = record.get("timestamp", "")
+    return (
+        (ratings is None or record.get("rating") in ratings)
+        and (not since or timestamp >= since)
+        and (not until or timestamp < until)
+    )
+
+
+class SubmissionStore:
+    """Append-only JSON-lines log with an in-memory index and background compaction."""
+
+    def __init__(
+        self,
+        path: str,
+        compact_min_dead: int = 1000,
+        compact_ratio: float = 0.5,
+        tombstone_retention: int = 10000,
+    ):
+        self.path = path
+        self.compact_min_dead = compact_min_dead
+        self.compact_ratio = compact_ratio
+        self.tombstone_retention = tombstone_retention
+
+        self._lock = threading.RLock()
+        # Guards the file handle during fsync; taken after _lock, never before it.
+        self._sync_lock = threading.Lock()
+        self._appended = 0
+        self._synced = 0
+        self._records: Dict[str, dict] = {}
+        # Secondary indexes, ascending by (timestamp, id).
+        self._by_time: List[SortKey] = []
+        self._by_rating: Dict[int, List[SortKey]] = {}
+        self._search = InvertedIndex()
+        self._indexed = False
+        # Running aggregates: rating histogram and per-day / per-hour rollups of
+        # [count, rating_sum, n_1_star, ..., n_5_star].
+        self._histogram: Dict[int, int] = {}
+        self._rating_sum = 0
+        self._daily: Dict[str, List[int]] = {}
+        self._hourly: Dict[str, List[int]] = {}
+        # Change sequence: every write gets the next seq. Live ids and retained
+        # tombstones are each kept in seq order so changes() walks only the tail;
+        # changes at or below _horizon have been forgotten.
+        self._seq = 0
+        self._horizon = 0
+        self._live_seq: "OrderedDict[str, int]" = OrderedDict()
+        self._tombstones: "OrderedDict[str, int]" = OrderedDict()
+        # Enrichment leases: submission id -> (owner, expires_at).
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._dead = 0
+        self._file = None
+        self._compacting = False
+        self._compaction_tail: Optional[List[str]] = None
+
+        self._load()
+        self._build_indexes()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # Recovery
+
+    def _load(self):
+        """
+        Replay the log into memory.
+
+        Only a torn final line (no trailing newline) is an interrupted append
+        and is truncated away; a damaged line in the middle of the log is
+        skipped, so the entries after it are never lost.
+        """
+        tmp_path = self.path + ".compact"
+        if os.path.exists(tmp_path):
+            # A compaction that never reached os.replace; the original log is still authoritative.
+            os.remove(tmp_path)
+
+        if not os.path.exists(self.path):
+            return
+
+        offset = 0
+        torn_offset = None
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    torn_offset = offset
+                    break
+                try:
+                    entry = json.loads(raw)
+                    if not isinstance(entry, dict):
+                        raise ValueError("not a log entry")
+                except ValueError:
+                    logger.error(f"Skipping corrupt entry at offset {offset} in {self.path}")
+                else:
+                    self._apply(entry)
+                offset += len(raw)
+
+        if torn_offset is not None:
+            logger.warning(f"Discarding incomplete trailing entry at offset {torn_offset} in {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(torn_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+        logger.info(f"Loaded {len(self._records)} submissions from {self.path}")
+
+    def _apply(self, entry: dict):
+        op = entry.get("op")
+        if op == OP_META:
+            self._horizon = max(self._horizon, entry.get("horizon", 0))
+            self._seq = max(self._seq, self._horizon)
+            return
+        # Entries written before change sequences existed are numbered in log order.
+        seq = entry.get("seq") or self._seq + 1
+        self._seq = max(self._seq, seq)
+        if op == OP_PUT:
+            record = entry["record"]
+            previous = self._records.get(record["id"])
+            if previous is not None:
+                self._dead += 1
+                self._unindex(previous)
+            self._records[record["id"]] = record
+            self._index(record)
+            self._track_change(record["id"], seq, deleted=False)
+        elif op == OP_DELETE:
+            previous = self._records.pop(entry["id"], None)
+            if previous is not None:
+                self._dead += 1
+                self._unindex(previous)
+            self._track_change(entry["id"], seq, deleted=True)
+            self._dead += 1
+
+    def _track_change(self, submission_id: str, seq: int, deleted: bool):
+        self._live_seq.pop(submission_id, None)
+        self._tombstones.pop(submission_id, None)
+        (self._tombstones if deleted else self._live_seq)[submission_id] = seq
+        while len(self._tombstones) > self.tombstone_retention:
+            _, forgotten = self._tombstones.popitem(last=False)
+            self._horizon = max(self._horizon, forgotten)
+
+    # Indexes
+
+    def _build_indexes(self):
+        """Build secondary indexes in one sort after replay rather than per entry."""
+        self._by_time = sorted(sort_key(r) for r in self._records.values())
+        self._by_rating = {}
+        for key in self._by_time:
+            record = self._records[key[1]]
+            self._by_rating.setdefault(record.get("rating"), []).append(key)
+            self._search.add(record)
+            self._count(record, 1)
+        self._indexed = True
+
+    def _index(self, record: dict):
+        if not self._indexed:
+            return
+        key = sort_key(record)
+        insort(self._by_time, key)
+        insort(self._by_rating.setdefault(record.get("rating"), []), key)
+        self._search.add(record)
+        self._count(record, 1)
+
+    def _unindex(self, record: dict):
+        if not self._indexed:
+            return
+        key = sort_key(record)
+        for keys in (self._by_time, self._by_rating.get(record.get("rating"), [])):
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+        self._search.remove(record["id"])
+        self._count(record, -1)
+
+    def _count(self, record: dict, sign: int):
+        rating = record.get("rating") or 0
+        self._histogram[rating] = self._histogram.get(rating, 0) + sign
+        self._rating_sum += sign * rating
+
+        timestamp = record.get("timestamp", "")
+        for buckets, bucket in ((self._daily, timestamp[:10]), (self._hourly, timestamp[:13])):
+            counts = buckets.setdefault(bucket, [0] * (2 + len(RATINGS)))
+            counts[0] += sign
+            counts[1] += sign * rating
+            if rating in RATINGS:
+                counts[1 + rating] += sign
+            if counts[0] == 0:
+                del buckets[bucket]
+
+    # Writes
+
+    def _write(self, entries: List[dict]) -> int:
+        """
+        Append entries and apply them in memory; call with the lock held.
+
+        The data is flushed to the OS but not fsynced. Returns a ticket to pass
+        to _sync once the lock has been released.
+        """
+        for i, entry in enumerate(entries, start=1):
+            entry["seq"] = self._seq + i
+        lines = "".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries)
+        size = os.fstat(self._file.fileno()).st_size
+        try:
+            self._file.write(lines)
+            self._file.flush()
+        except Exception:
+            self._seal(size)
+            raise
+        if self._compaction_tail is not None:
+            self._compaction_tail.append(lines)
+        for entry in entries:
+            self._apply(entry)
+        self._appended += 1
+        return self._appended
+
+    def _sync(self, ticket: int):
+        """
+        Group commit: fsync outside the store lock, so reads are never stuck
+        behind the disk. One fsync covers every append flushed before it
+        started, so concurrent writers that queue up here usually find their
+        ticket already synced.
+        """
+        with self._sync_lock:
+            if self._synced >= ticket:
+                return
+            target = self._appended
+            os.fsync(self._file.fileno())
+            self._synced = target
+
+    def _seal(self, size: int):
+        """Cut a failed append back to `size` so the next entry starts on a fresh line."""
+        with self._sync_lock:
+            try:
+                # Closing discards the unwritten buffer; it may raise the same error again.
+                self._file.close()
+            except OSError:
+                pass
+            try:
+                os.truncate(self.path, size)
+            finally:
+                self._file = open(self.path, "a", encoding="utf-8")
+
+    def put(self, record: dict):
+        """Insert or replace a submission."""
+        self.put_many([record])
+
+    def put_many(self, records: List[dict]):
+        """Insert or replace several submissions with a single append and fsync."""
+        with self._lock:
+            ticket = self._write([{"op": OP_PUT, "record": r} for r in records])
+        self._sync(ticket)
+        self._maybe_compact()
+
+    def delete(self, submission_id: str) -> bool:
+        """Record a tombstone for the given submission; returns False without writing if it does not exist."""
+        with self._lock:
+            if submission_id not in self._records:
+                return False
+            ticket = self._write([{"op": OP_DELETE, "id": submission_id}])
+        self._sync(ticket)
+        self._maybe_compact()
+        return True
+
+    def claim_enrichment(self, submission_id: str, owner: str, lease_seconds: float) -> bool:
+        """Take or renew a lease on a submission's enrichment; False while another owner holds it."""
+        now = time.time()
+        with self._lock:
+            held = self._leases.get(submission_id)
+            if held is not None and held[0] != owner and held[1] > now:
+                return False
+            self._leases[submission_id] = (owner, now + lease_seconds)
+            return True
+
+    def release_enrichment(self, submission_id: str, owner: str):
+        with self._lock:
+            held = self._leases.get(submission_id)
+            if held is not None and held[0] == owner:
+                del self._leases[submission_id]
+
+    # Reads
+
+    def get(self, submission_id: str) -> Optional[dict]:
+        """Return a single live submission, or None."""
+        return self._records.get(submission_id)
+
+    def all(self) -> List[dict]:
+        """Return live submissions in insertion order."""
+        with self._lock:
+            return list(self._records.values())
+
+    def page(
+        self,
+        rating: Optional[int] = None,
+        after: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        ratings: Optional[Iterable[int]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Return submissions newest first, using keyset pagination.
+
+        `after` is the (timestamp, id) of the last row of the previous page.
+        `ratings` (or a single `rating`) selects the per-rating indexes, which
+        are merged newest first; `since`/`until` bound the timestamp (inclusive
+        and exclusive) by bisecting them; `q` is a case-insensitive keyword
+        matched against the review text while scanning.
+        """
+        if rating is not None:
+            ratings = [rating]
+        with self._lock:
+            if ratings is None:
+                indexes = [self._by_time]
+            else:
+                indexes = [self._by_rating.get(r, []) for r in sorted(set(ratings))]
+
+            runs = []
+            for keys in indexes:
+                start = bisect_left(keys, (since, "")) if since else 0
+                end = len(keys)
+                if until:
+                    end = bisect_left(keys, (until, ""))
+                if after is not None:
+                    end = min(end, bisect_left(keys, after))
+                if not q and limit:
+                    # Without a keyword filter only the newest `limit` keys of each run can be returned.
+                    start = max(start, end - limit)
+                runs.append(reversed(keys[start:end]))
+
+            results = []
+            for key in merge(*runs, reverse=True):
+                record = self._records[key[1]]
+                if q and not matches_keyword(record, q):
+                    continue
+                results.append(record)
+                if limit and len(results) == limit:
+                    break
+            return results
+
+    def search(
+        self,
+        q: str,
+        limit: Optional[int] = 20,
+        ratings: Optional[Iterable[int]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Tuple[dict, float]]:
+        """Rank submissions for `q` with the in-memory BM25 index; filters are applied to the matches."""
+        ratings = set(ratings) if ratings is not None else None
+        with self._lock:
+            results = []
+            for doc_id, score in self._search.search(q, limit=None):
+                record = self._records[doc_id]
+                if matches_filters(record, ratings, since, until):
+                    results.append((record, score))
+                    if limit and len(results) == limit:
+                        break
+            return results
+
+    def changes(self, since: int = 0) -> dict:
+        """
+        Submissions upserted and ids deleted after change sequence `since`.
+
+        Only the tail of the seq-ordered change lists is walked, so the cost is
+        proportional to the number of changes. When `since` predates the
+        retained tombstones (or is 0, or comes from a different log) the result
+        is a full snapshot with "reset": True.
+        """
+        with self._lock:
+            if since <= 0 or since < self._horizon or since > self._seq:
+                return {"seq": self._seq, "reset": True, "upserts": list(self._records.values()), "deletes": []}
+
+            upserts, deletes = [], []
+            for changed, out in ((self._live_seq, upserts), (self._tombstones, deletes)):
+                for submission_id in reversed(changed):
+                    if changed[submission_id] <= since:
+                        break
+                    out.append(submission_id)
+            return {
+                "seq": self._seq,
+                "reset": False,
+                "upserts": [self._records[i] for i in reversed(upserts)],
+                "deletes": deletes[::-1],
+            }
+
+    def timeseries(self, bucket: str = "day", since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """
+        Hourly or daily rollups overlapping [since, until), oldest first, read
+        straight from the running aggregates.
+        """
+        buckets = {"day": self._daily, "hour": self._hourly}[bucket]
+        lower = since[:BUCKET_LENGTHS[bucket]] if since else None
+        with self._lock:
+            keys = sorted(k for k in buckets if (not lower or k >= lower) and (not until or k < until))
+            return [rollup_point(key, buckets[key]) for key in keys]
+
+    def stats(self, now: Optional[datetime] = None) -> dict:
+        """Aggregate counters, plus today and last hour/day/week windows from the time buckets."""
+        now = now or datetime.now()
+        with self._lock:
+            windows = {}
+            for name, hours in (("last_hour", 1), ("last_day", 24), ("last_week", 168)):
+                count = rating_sum = 0
+                for h in range(hours):
+                    bucket = self._hourly.get((now - timedelta(hours=h)).strftime("%Y-%m-%dT%H"))
+                    if bucket:
+                        count += bucket[0]
+                        rating_sum += bucket[1]
+                windows[name] = {"count": count, "rating_sum": rating_sum}
+            today = self._daily.get(now.strftime("%Y-%m-%d"), [0, 0])
+            windows["today"] = {"count": today[0], "rating_sum": today[1]}
+
+            return {
+                "total": len(self._records),
+                "rating_sum": self._rating_sum,
+                "histogram": {k: v for k, v in self._histogram.items() if v},
+                "windows": windows,
+            }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # Compaction
+
+    def _maybe_compact(self):
+        with self._lock:
+            if self._compacting or self._dead < self.compact_min_dead:
+                return
+            if self._dead < self.compact_ratio * max(len(self._records), 1):
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name="submission-compactor", daemon=True).start()
+
+    def compact(self):
+        """Rewrite the log with only live records, without blocking writers for the bulk copy."""
+        with self._lock:
+            # Live records and retained tombstones in seq order, so replay rebuilds the change lists.
+            snapshot = list(merge(
+                ((seq, {"op": OP_PUT, "seq": seq, "record": self._records[i]}) for i, seq in self._live_seq.items()),
+                ((seq, {"op": OP_DELETE, "seq": seq, "id": i}) for i, seq in self._tombstones.items()),
+                key=lambda item: item[0],
+            ))
+            horizon = self._horizon
+            self._compaction_tail = []
+            self._compacting = True
+
+        tmp_path = self.path + ".compact"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"op": OP_META, "horizon": horizon}, separators=(",", ":")) + "\n")
+                for _, entry in snapshot:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                # The bulk copy and the entries appended meanwhile are fsynced without
+                # the lock, so reads are only held up by the fsync of the last few entries.
+                with self._lock:
+                    appended, self._compaction_tail = self._compaction_tail, []
+                f.writelines(appended)
+                f.flush()
+                os.fsync(f.fileno())
+
+                with self._lock:
+                    # Entries written during that fsync.
+                    f.writelines(self._compaction_tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    with self._sync_lock:
+                        self._file.close()
+                        os.replace(tmp_path, self.path)
+                        self._file = open(self.path, "a", encoding="utf-8")
+                        # Every append so far is in the file just fsynced.
+                        self._synced = self._appended
+                    self._dead = 0
+            logger.info(f"Compacted {self.path} to {len(snapshot)} entries")
+        except Exception as e:
+            logger.error(f"Error compacting submissions log: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            with self._lock, self._sync_lock:
+                if self._file.closed:
+                    self._file = open(self.path, "a", encoding="utf-8")
+        finally:
+            with self._lock:
+                self._compaction_tail = None
+                self._compacting = False
+
+    def import_legacy(self, json_path: str):
+        """One-time import of the old whole-file JSON array store."""
+        if len(self._records) or not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r") as f:
+                submissions = json.load(f)
+        except Exception as e:
+            logger.error(f"Error importing legacy submissions: {e}")
+            return
+        self.put_many(submissions)
+        logger.info(f"Imported {len(submissions)} submissions from {json_path}")
+
+    def close(self):
+        with self._lock, self._sync_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class SQLiteSubmissionStore:
+    """
+    SQLite-backed store with the same interface as SubmissionStore.
+
+    Runs in WAL mode so several uvicorn workers can share one database file;
+    filtering, ordering, pagination and aggregates are done in SQL.
+    """
+
+    def __init__(self, path: str, change_retention: int = 100000):
+        self.path = path
+        self.change_retention = change_retention
+        self._local = threading.local()
+
+        conn = self._conn()
+        with conn:
+            # Workers opening a fresh file together would race between checking for a
+            # table and creating or backfilling it; the write lock serializes setup.
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                "id TEXT PRIMARY KEY, rating INTEGER NOT NULL, timestamp TEXT NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_submissions_timestamp ON submissions (timestamp, id)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_submissions_rating_timestamp ON submissions (rating, timestamp, id)"
+            )
+            self._create_search_index(conn)
+            # AUTOINCREMENT never reuses a seq, even after old changes are pruned.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS change_log ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL, op TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS enrichment_leases ("
+                "id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._create_rollups(conn)
+        logger.info(f"Opened SQLite store at {self.path}")
+
+    @staticmethod
+    def _create_search_index(conn: sqlite3.Connection):
+        """
+        FTS5 table kept in step with submissions by triggers, keyed on the row's
+        rowid. Runs inside the caller's BEGIN IMMEDIATE, so the backfill sees no
+        concurrent inserts.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'submissions_fts'"
+        ).fetchone()
+        if exists:
+            return
+        columns = "json_extract({row}.data, '$.review'), json_extract({row}.data, '$.ai_summary')"
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS submissions_fts USING fts5(review, ai_summary)")
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS submissions_fts_insert AFTER INSERT ON submissions BEGIN "
+            f"INSERT INTO submissions_fts (rowid, review, ai_summary) VALUES (new.rowid, {columns.format(row='new')}); END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS submissions_fts_delete AFTER DELETE ON submissions BEGIN "
+            "DELETE FROM submissions_fts WHERE rowid = old.rowid; END"
+        )
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS submissions_fts_update AFTER UPDATE ON submissions BEGIN "
+            "DELETE FROM submissions_fts WHERE rowid = old.rowid; "
+            f"INSERT INTO submissions_fts (rowid, review, ai_summary) VALUES (new.rowid, {columns.format(row='new')}); END"
+        )
+        conn.execute(
+            "INSERT INTO submissions_fts (rowid, review, ai_summary) "
+            f"SELECT rowid, {columns.format(row='submissions')} FROM submissions"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 keeps its prepared statements cached on it."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _create_rollups(conn: sqlite3.Connection):
+        """
+        Hourly and daily rollup rows kept current by triggers, so time series
+        never scan submissions. Runs inside the caller's BEGIN IMMEDIATE, so the
+        backfill cannot race with trigger-driven inserts from another worker.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'submission_rollups'"
+        ).fetchone()
+        if exists:
+            return
+        star_columns = ", ".join(f"n{k} INTEGER NOT NULL DEFAULT 0" for k in RATINGS)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS submission_rollups (granularity TEXT NOT NULL, bucket TEXT NOT NULL, "
+            f"count INTEGER NOT NULL, rating_sum INTEGER NOT NULL, {star_columns}, "
+            "PRIMARY KEY (granularity, bucket))"
+        )
+
+        def adjust(row: str, sign: str) -> str:
+            names = ", ".join(f"n{k}" for k in RATINGS)
+            values = ", ".join(f"{sign}({row}.rating = {k})" for k in RATINGS)
+            updates = ", ".join(f"n{k} = n{k} + excluded.n{k}" for k in RATINGS)
+            return " ".join(
+                f"INSERT INTO submission_rollups (granularity, bucket, count, rating_sum, {names}) "
+                f"VALUES ('{granularity}', substr({row}.timestamp, 1, {length}), {sign}1, {sign}{row}.rating, {values}) "
+                "ON CONFLICT (granularity, bucket) DO UPDATE SET count = count + excluded.count, "
+                f"rating_sum = rating_sum + excluded.rating_sum, {updates};"
+                for granularity, length in BUCKET_LENGTHS.items()
+            )
+
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS submission_rollups_insert AFTER INSERT ON submissions BEGIN {adjust('new', '')} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS submission_rollups_delete AFTER DELETE ON submissions BEGIN {adjust('old', '-')} END")
+        conn.execute(
+            "CREATE TRIGGER IF NOT EXISTS submission_rollups_update AFTER UPDATE OF rating, timestamp ON submissions "
+            f"BEGIN {adjust('old', '-')} {adjust('new', '')} END"
+        )
+        star_sums = ", ".join(f"SUM(rating = {k})" for k in RATINGS)
+        for granularity, length in BUCKET_LENGTHS.items():
+            conn.execute(
+                "INSERT INTO submission_rollups "
+                f"SELECT '{granularity}', substr(timestamp, 1, {length}), COUNT(*), SUM(rating), {star_sums} "
+                "FROM submissions GROUP BY 2"
+            )
+
+    # Writes
+
+    def put(self, record: dict):
+        """Insert or replace a submission."""
+        self.put_many([record])
+
+    def put_many(self, records: List[dict]):
+        conn = self._conn()
+        with conn:
+            # An upsert keeps the rowid stable, so the FTS triggers see a plain UPDATE.
+            conn.executemany(
+                "INSERT INTO submissions (id, rating, timestamp, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET rating = excluded.rating, timestamp = excluded.timestamp, "
+                "data = excluded.data",
+                [(r["id"], r.get("rating") or 0, r.get("timestamp", ""), json.dumps(r)) for r in records],
+            )
+            self._log_changes(conn, [(r["id"], OP_PUT) for r in records])
+
+    def delete(self, submission_id: str) -> bool:
+        """Delete a submission; returns False if it does not exist."""
+        conn = self._conn()
+        with conn:
+            if conn.execute("DELETE FROM submissions WHERE id = ?", (submission_id,)).rowcount == 0:
+                return False
+            self._log_changes(conn, [(submission_id, OP_DELETE)])
+            return True
+
+    def _log_changes(self, conn: sqlite3.Connection, changes: List[Tuple[str, str]]):
+        """Append to the change log in the caller's transaction and prune beyond the retention window."""
+        conn.executemany("INSERT INTO change_log (id, op) VALUES (?, ?)", changes)
+        cutoff = self._current_seq(conn) - self.change_retention
+        if cutoff > 0 and conn.execute("DELETE FROM change_log WHERE seq <= ?", (cutoff,)).rowcount:
+            conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES ('horizon', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (cutoff,),
+            )
+
+    def claim_enrichment(self, submission_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Take or renew a lease on a submission's enrichment; False while another
+        owner holds it. A single upsert, so concurrent workers cannot both win.
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            claimed = conn.execute(
+                "INSERT INTO enrichment_leases (id, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE enrichment_leases.owner = excluded.owner OR enrichment_leases.expires_at <= ?",
+                (submission_id, owner, now + lease_seconds, now),
+            ).rowcount
+        return claimed == 1
+
+    def release_enrichment(self, submission_id: str, owner: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM enrichment_leases WHERE id = ? AND owner = ?", (submission_id, owner))
+
+    @staticmethod
+    def _current_seq(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+
+    # Reads
+
+    def get(self, submission_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT data FROM submissions WHERE id = ?", (submission_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self) -> List[dict]:
+        rows = self._conn().execute("SELECT data FROM submissions ORDER BY rowid").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def page(
+        self,
+        rating: Optional[int] = None,
+        after: Optional[SortKey] = None,
+        limit: Optional[int] = None,
+        ratings: Optional[Iterable[int]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> List[dict]:
+        """Return submissions newest first, using keyset pagination on (timestamp, id)."""
+        if rating is not None:
+            ratings = [rating]
+        clauses, params = [], []
+        if ratings is not None:
+            ratings = sorted(set(ratings))
+            clauses.append(f"rating IN ({', '.join('?' * len(ratings))})")
+            params.extend(ratings)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if after is not None:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(after)
+        if q:
+            clauses.append("instr(lower(json_extract(data, '$.review')), ?) > 0")
+            params.append(q.lower())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit if limit else -1)
+
+        rows = self._conn().execute(
+            f"SELECT data FROM submissions {where} ORDER BY timestamp DESC, id DESC LIMIT ?", params
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def search(
+        self,
+        q: str,
+        limit: Optional[int] = 20,
+        ratings: Optional[Iterable[int]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Tuple[dict, float]]:
+        """Rank submissions for `q` with FTS5's bm25(); each query term matches as a prefix."""
+        terms = tokenize(q)
+        if not terms:
+            return []
+        clauses, params = ["submissions_fts MATCH ?"], [" OR ".join(f'"{term}"*' for term in terms)]
+        if ratings is not None:
+            ratings = sorted(set(ratings))
+            clauses.append(f"s.rating IN ({', '.join('?' * len(ratings))})")
+            params.extend(ratings)
+        if since:
+            clauses.append("s.timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.timestamp < ?")
+            params.append(until)
+        params.append(limit if limit else -1)
+
+        # bm25() is lower-is-better; negate it so scores sort like the in-memory index.
+        rows = self._conn().execute(
+            "SELECT s.data, -bm25(submissions_fts) AS score FROM submissions_fts "
+            "JOIN submissions s ON s.rowid = submissions_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY score DESC LIMIT ?",
+            params,
+        ).fetchall()
+        return [(json.loads(data), score) for data, score in rows]
+
+    def changes(self, since: int = 0) -> dict:
+        """
+        Submissions upserted and ids deleted after change sequence `since`,
+        read from the change log; a full snapshot with "reset": True when
+        `since` is 0 or older than the retained log.
+        """
+        conn = self._conn()
+        # One read transaction, so the seq and the rows come from the same snapshot.
+        with conn:
+            conn.execute("BEGIN")
+            seq = self._current_seq(conn)
+            row = conn.execute("SELECT value FROM store_meta WHERE key = 'horizon'").fetchone()
+            horizon = row[0] if row else 0
+            if since <= 0 or since < horizon or since > seq:
+                rows = conn.execute("SELECT data FROM submissions ORDER BY rowid").fetchall()
+                return {"seq": seq, "reset": True, "upserts": [json.loads(r[0]) for r in rows], "deletes": []}
+
+            latest: Dict[str, str] = {}
+            for submission_id, op in conn.execute(
+                "SELECT id, op FROM change_log WHERE seq > ? AND seq <= ? ORDER BY seq", (since, seq)
+            ):
+                latest.pop(submission_id, None)
+                latest[submission_id] = op
+            upsert_ids = [i for i, op in latest.items() if op == OP_PUT]
+            records = {}
+            for start in range(0, len(upsert_ids), 500):
+                chunk = upsert_ids[start:start + 500]
+                for data, in conn.execute(
+                    f"SELECT data FROM submissions WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                ):
+                    record = json.loads(data)
+                    records[record["id"]] = record
+        return {
+            "seq": seq,
+            "reset": False,
+            "upserts": [records[i] for i in upsert_ids if i in records],
+            "deletes": [i for i, op in latest.items() if op == OP_DELETE],
+        }
+
+    def timeseries(self, bucket: str = "day", since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """Hourly or daily rollups overlapping [since, until), oldest first, from the rollup table."""
+        length = BUCKET_LENGTHS[bucket]
+        clauses, params = ["granularity = ?", "count > 0"], [bucket]
+        if since:
+            clauses.append("bucket >= ?")
+            params.append(since[:length])
+        if until:
+            clauses.append("bucket < ?")
+            params.append(until)
+        stars = ", ".join(f"n{k}" for k in RATINGS)
+        rows = self._conn().execute(
+            f"SELECT bucket, count, rating_sum, {stars} FROM submission_rollups "
+            f"WHERE {' AND '.join(clauses)} ORDER BY bucket",
+            params,
+        ).fetchall()
+        return [rollup_point(row[0], list(row[1:])) for row in rows]
+
+    def stats(self, now: Optional[datetime] = None) -> dict:
+        """
+        Aggregate counters, plus today and last hour/day/week windows, read from
+        the rollup table in one statement. Totals sum the daily rows; windows use
+        the same buckets as SubmissionStore.stats.
+        """
+        now = now or datetime.now()
+        hour = now.strftime("%Y-%m-%dT%H")
+        today = now.strftime("%Y-%m-%d")
+        starts = {name: (now - timedelta(hours=hours - 1)).strftime("%Y-%m-%dT%H")
+                  for name, hours in (("last_hour", 1), ("last_day", 24), ("last_week", 168))}
+        stars = ", ".join(f"n{k}" for k in RATINGS)
+        rows = self._conn().execute(
+            f"SELECT granularity, bucket, count, rating_sum, {stars} FROM submission_rollups "
+            "WHERE granularity = 'day' OR (granularity = 'hour' AND bucket >= ? AND bucket <= ?)",
+            (starts["last_week"], hour),
+        ).fetchall()
+
+        total = rating_sum = 0
+        histogram = dict.fromkeys(RATINGS, 0)
+        windows = {name: {"count": 0, "rating_sum": 0} for name in (*starts, "today")}
+        for granularity, bucket, count, bucket_sum, *star_counts in rows:
+            if granularity == "day":
+                total += count
+                rating_sum += bucket_sum
+                for k, n in zip(RATINGS, star_counts):
+                    histogram[k] += n
+                if bucket == today:
+                    windows["today"] = {"count": count, "rating_sum": bucket_sum}
+                continue
+            for name, start in starts.items():
+                if bucket >= start:
+                    windows[name]["count"] += count
+                    windows[name]["rating_sum"] += bucket_sum
+
+        return {
+            "total": total,
+            "rating_sum": rating_sum,
+            "histogram": {k: v for k, v in histogram.items() if v},
+            "windows": windows,
+        }
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def import_legacy(self, json_path: str):
+        """One-time import of the old whole-file JSON array store."""
+        if len(self) or not os.path.exists(json_path):
+            return
+        try:
+            with open(json_path, "r") as f:
+                submissions = json.load(f)
+        except Exception as e:
+            logger.error(f"Error importing legacy submissions: {e}")
+            return
+        self.put_many(submissions)
+        logger.info(f"Imported {len(submissions)} submissions from {json_path}")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+Store = Union[SubmissionStore, SQLiteSubmissionStore]
+
+
+def create_store(backend: str, log_path: str, sqlite_path: str) -> Store:
+    """Build the submission store selected by STORAGE_BACKEND ("log" or "sqlite")."""
+    if backend == "sqlite":
+        return SQLiteSubmissionStore(sqlite_path)
+    if backend != "log":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return SubmissionStore(log_path)
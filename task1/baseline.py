@@ -0,0 +1,127 @@
+"""
+Local baseline classifier
+Hashed unigram/bigram features with a multinomial logistic regression written
+in NumPy, trained on the reviews outside the evaluation sample. Gives a
+no-API reference point for accuracy and throughput next to the LLM approaches.
+"""
+
+import re
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from metrics import LABELS
+
+N_FEATURES = 2 ** 18
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class HashedFeatures:
+    """CSR matrix of L2-normalized, log-scaled hashed n-gram counts."""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, values: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def take(self, rows: np.ndarray) -> "HashedFeatures":
+        """Select rows (in the given order) without a Python-level loop."""
+        starts, lengths = self.indptr[rows], np.diff(self.indptr)[rows]
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        gather = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return HashedFeatures(indptr, self.indices[gather], self.values[gather])
+
+    def dot(self, weights: np.ndarray) -> np.ndarray:
+        """X @ W for a dense (n_features, k) W."""
+        out = np.zeros((len(self), weights.shape[1]))
+        np.add.at(out, self.row_ids(), weights[self.indices] * self.values[:, None])
+        return out
+
+
+def hash_features(texts: List[str], n_features: int = N_FEATURES) -> HashedFeatures:
+    """Tokenize, hash unigrams and bigrams with crc32 and normalize each row."""
+    indptr, indices, values = [0], [], []
+    for text in texts:
+        tokens = _TOKEN.findall(str(text).lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        buckets = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+        unique, counts = np.unique(buckets % n_features, return_counts=True)
+        weights = np.log1p(counts)
+        norm = np.sqrt((weights ** 2).sum())
+        indices.append(unique)
+        values.append(weights / norm if norm else weights)
+        indptr.append(indptr[-1] + len(unique))
+    return HashedFeatures(
+        np.asarray(indptr, dtype=np.int64),
+        np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+        np.concatenate(values) if values else np.zeros(0),
+    )
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class HashedLogisticBaseline:
+    """Softmax regression over hashed n-grams, trained with sparse minibatch SGD."""
+
+    def __init__(self, n_features: int = N_FEATURES, epochs: int = 5, batch_size: int = 32,
+                 learning_rate: float = 8.0, l2: float = 1e-5, seed: int = 42):
+        self.n_features = n_features
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.weights: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+
+    def fit(self, texts: List[str], stars) -> "HashedLogisticBaseline":
+        X = hash_features(texts, self.n_features)
+        y = np.asarray(stars, dtype=int) - LABELS[0]
+        rng = np.random.default_rng(self.seed)
+        self.weights = np.zeros((self.n_features, len(LABELS)))
+        self.bias = np.log((np.bincount(y, minlength=len(LABELS)) + 1) / (len(y) + len(LABELS)))
+
+        for epoch in range(self.epochs):
+            lr = self.learning_rate / (1 + epoch)
+            order = rng.permutation(len(X))
+            for start in range(0, len(order), self.batch_size):
+                rows = order[start:start + self.batch_size]
+                batch = X.take(rows)
+                grad = _softmax(batch.dot(self.weights) + self.bias)
+                grad[np.arange(len(rows)), y[rows]] -= 1
+                grad /= len(rows)
+
+                # Only the hashed features present in the batch receive an update;
+                # L2 shrinkage is applied lazily to those same rows.
+                touched, inverse = np.unique(batch.indices, return_inverse=True)
+                feature_grad = np.zeros((len(touched), len(LABELS)))
+                np.add.at(feature_grad, inverse, grad[batch.row_ids()] * batch.values[:, None])
+                feature_grad += self.l2 * self.weights[touched]
+                self.weights[touched] -= lr * feature_grad
+                self.bias -= lr * grad.sum(axis=0)
+        return self
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """(n, 5) class probabilities for 1-5 stars."""
+        return _softmax(hash_features(texts, self.n_features).dot(self.weights) + self.bias)
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        return LABELS[self.predict_proba(texts).argmax(axis=1)]
+
+
+def train_baseline(texts: List[str], stars, **kwargs) -> Tuple[HashedLogisticBaseline, float]:
+    """Fit the baseline and return it with the training time in seconds."""
+    start_time = time.time()
+    model = HashedLogisticBaseline(**kwargs).fit(texts, stars)
+    return model, time.time() - start_time
@@ -0,0 +1,108 @@
+"""
+Multi-review batched prompting
+Packs K reviews into one request that answers with a JSON array, validates
+each element, and re-queries only the reviews that came back missing or
+malformed.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from eval_runner import run_calls
+from response_parser import coerce_stars, find_json
+
+BATCH_PROMPT = """You are a restaurant review sentiment classifier. For each review below, predict the star rating (1-5).
+
+{reviews}
+
+Respond ONLY with a valid JSON array containing exactly one object per review, in this exact format:
+[{{"id": <review number>, "predicted_stars": <number 1-5>, "explanation": "<brief reason>"}}, ...]"""
+
+
+def build_batch_prompt(reviews: List[Tuple[int, str]]) -> str:
+    """Number each review so answers can be matched back by id."""
+    body = "\n\n".join(f'Review {rid}: "{text}"' for rid, text in reviews)
+    return BATCH_PROMPT.format(reviews=body)
+
+
+def parse_batch_response(raw: Optional[str], expected_ids: List[int]) -> Dict[int, Dict]:
+    """Return {id: {"predicted_stars", "explanation"}} for every well-formed element."""
+    items = find_json(raw, list) or []
+    expected = set(expected_ids)
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            rid = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        stars = coerce_stars(item.get("predicted_stars"))
+        if rid in expected and stars is not None and rid not in parsed:
+            parsed[rid] = {"predicted_stars": stars, "explanation": str(item.get("explanation", ""))}
+    return parsed
+
+
+def evaluate_batched(
+    reviews: List[str],
+    batch_size: int,
+    call: Callable[[str], Dict],
+    concurrency: int = 8,
+    rate_limit: Optional[float] = None,
+    max_requery_rounds: int = 2,
+    lookup: Optional[Callable[[str], Optional[Dict]]] = None,
+    remember: Optional[Callable[[str, Dict], None]] = None,
+) -> Tuple[List[Dict], Dict]:
+    """
+    Classify `reviews` K at a time.
+
+    Returns one call_llm-shaped response per review (latency is the batch
+    latency amortized over its reviews, or None if any attempt came from the
+    cache) and stats with the request count, cached batches, re-queried
+    reviews and wall-clock time. `remember(prompt, result)` is called only for
+    new batches in which every review parsed, so a batch that needs
+    re-querying is never served from the cache.
+    """
+    responses: List[Optional[Dict]] = [None] * len(reviews)
+    pending = list(range(len(reviews)))
+    requests = cached = requeried = 0
+    start_time = time.time()
+
+    for round_number in range(max_requery_rounds + 1):
+        if not pending:
+            break
+        if round_number:
+            requeried += len(pending)
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        # Ids are 1-based positions within the batch, which keeps prompts short.
+        prompts = [build_batch_prompt([(j + 1, reviews[i]) for j, i in enumerate(batch)]) for batch in batches]
+        results = run_calls(prompts, call, concurrency=concurrency, rate_limit=rate_limit,
+                            progress_every=0, lookup=lookup)
+        requests += sum(not r.get("cached") for r in results)
+        cached += sum(bool(r.get("cached")) for r in results)
+
+        still_missing = []
+        for prompt, batch, result in zip(prompts, batches, results):
+            parsed = parse_batch_response(result.get("raw"), list(range(1, len(batch) + 1)))
+            if remember and not result.get("cached") and len(parsed) == len(batch):
+                remember(prompt, {k: v for k, v in result.items() if k != "latency"})
+            share = result["latency"] / len(batch) if result["latency"] is not None else None
+            for j, i in enumerate(batch):
+                # Re-queried reviews accumulate the latency of every attempt.
+                previous = responses[i]["latency"] if responses[i] else 0
+                latency = share + previous if share is not None and previous is not None else None
+                if j + 1 in parsed:
+                    responses[i] = {"success": True, "data": parsed[j + 1], "raw": result.get("raw"),
+                                    "latency": latency, "cached": result.get("cached", False)}
+                else:
+                    still_missing.append(i)
+                    responses[i] = {"success": False, "error": result.get("error") or "Missing or malformed item",
+                                    "raw": result.get("raw"), "latency": latency}
+        pending = still_missing
+
+    return responses, {
+        "requests": requests,
+        "cached": cached,
+        "requeried": requeried,
+        "wall_time": time.time() - start_time,
+    }
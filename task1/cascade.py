@@ -0,0 +1,53 @@
+"""
+Local-first cascade
+The local baseline scores every review; only reviews whose top-two class
+probabilities are within a margin threshold are escalated to the LLM. LLM
+answers are collected once for the widest threshold, and each threshold is
+then scored offline against that shared set.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import LABELS
+
+
+def confidence_margin(proba: np.ndarray) -> np.ndarray:
+    """Top-1 minus top-2 class probability per row; small means uncertain."""
+    top_two = np.sort(proba, axis=1)[:, -2:]
+    return top_two[:, 1] - top_two[:, 0]
+
+
+def cascade_responses(
+    proba: np.ndarray,
+    local_latency: float,
+    llm_responses: Dict[int, Dict],
+    threshold: float,
+    llm_latency: Optional[float],
+) -> Tuple[List[Dict], int]:
+    """
+    Build call_llm-shaped responses for one threshold.
+
+    Rows with margin < `threshold` take the LLM answer from `llm_responses`
+    (keyed by row index) and pay `llm_latency` on top of the local scoring
+    time (None when no LLM call was timed); an LLM failure falls back to the
+    local prediction. Returns the responses and the number of escalated rows.
+    """
+    margin = confidence_margin(proba)
+    local_pred = LABELS[proba.argmax(axis=1)]
+    responses, escalated = [], 0
+    for i, (stars, m) in enumerate(zip(local_pred, margin)):
+        local = {"success": True, "data": {"predicted_stars": int(stars), "explanation": "", "source": "local"},
+                 "latency": local_latency}
+        if m >= threshold or i not in llm_responses:
+            responses.append(local)
+            continue
+        escalated += 1
+        llm = llm_responses[i]
+        latency = local_latency + llm_latency if llm_latency is not None else None
+        if llm.get("success") and isinstance(llm.get("data"), dict):
+            responses.append({**llm, "data": {**llm["data"], "source": "llm"}, "latency": latency})
+        else:
+            responses.append({**local, "latency": latency})
+    return responses, escalated
@@ -0,0 +1,85 @@
+"""
+Resumable evaluation checkpoint
+Appends every completed LLM call to a JSONL file keyed by
+(approach, review id, model, prompt hash), plus an early-stop marker for
+truncated streamed calls, so an interrupted run can resume and only pay for
+the calls that are still missing.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+CheckpointKey = Tuple[str, ...]
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def review_id(row) -> str:
+    """Stable identifier for a dataset row: its review_id, or a hash of the text."""
+    rid = row.get("review_id") if hasattr(row, "get") else None
+    if isinstance(rid, str) and rid:
+        return rid
+    return hashlib.sha256(str(row["review_text"]).encode("utf-8")).hexdigest()[:16]
+
+
+def checkpoint_key(approach: str, rid: str, model: str, prompt: str, early_stop: bool = False) -> CheckpointKey:
+    key = (approach, rid, model, prompt_hash(prompt))
+    return key + ("early_stop",) if early_stop else key
+
+
+class Checkpoint:
+    """Append-only JSONL checkpoint of call results."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._results: Dict[CheckpointKey, Dict] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self):
+        """Read recorded results, truncating a torn last line so the next append starts on a fresh line."""
+        offset = 0
+        torn_offset = None
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Interrupted mid-write.
+                    torn_offset = offset
+                    break
+                try:
+                    entry = json.loads(line)
+                    self._results[tuple(entry["key"])] = entry["result"]
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+
+        if torn_offset is not None:
+            with open(self.path, "r+b") as f:
+                f.truncate(torn_offset)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key: CheckpointKey) -> Optional[Dict]:
+        return self._results.get(key)
+
+    def record(self, key: CheckpointKey, result: Dict):
+        """Persist a result. Transport errors (no raw model output) are not recorded so they get retried."""
+        if result.get("raw") is None:
+            return
+        with self._lock:
+            self._results[key] = result
+            self._file.write(json.dumps({"key": list(key), "result": result}, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,85 @@
+"""
+Concurrent evaluation runner
+Fans LLM calls out over a thread pool, throttled by a token-bucket rate limiter,
+and returns results in input order with per-request latency.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def run_calls(
+    prompts: List[str],
+    call: Callable[[str], Dict],
+    concurrency: int = 8,
+    rate_limit: Optional[float] = None,
+    progress_every: int = 10,
+    on_result: Optional[Callable[[int, Dict], None]] = None,
+    lookup: Optional[Callable[[str], Optional[Dict]]] = None,
+) -> List[Dict]:
+    """
+    Execute `call(prompt)` for every prompt concurrently.
+
+    Each returned dict is the call's result with a "latency" key (seconds)
+    added, in the same order as `prompts`. `on_result(index, result)` is
+    invoked from the calling thread as each call finishes. Prompts that
+    `lookup` resolves (e.g. from a cache) are returned with "cached": True
+    and a latency of None, since no request was timed, without using a
+    worker or a rate-limit token.
+    """
+    bucket = TokenBucket(rate_limit) if rate_limit else None
+
+    def timed(prompt: str) -> Dict:
+        if bucket:
+            bucket.acquire()
+        start_time = time.time()
+        result = call(prompt)
+        return {**result, "latency": time.time() - start_time}
+
+    results: List[Optional[Dict]] = [None] * len(prompts)
+    remaining = []
+    for i, prompt in enumerate(prompts):
+        hit = lookup(prompt) if lookup else None
+        if hit is None:
+            remaining.append(i)
+            continue
+        results[i] = {**hit, "latency": None, "cached": True}
+        if on_result:
+            on_result(i, results[i])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(timed, prompts[i]): i for i in remaining}
+        for done, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result:
+                on_result(index, results[index])
+            if progress_every and done % progress_every == 0:
+                print(f"    Progress: {done}/{len(remaining)} requests completed...")
+    return results
@@ -0,0 +1,97 @@
+"""
+Persistent LLM call cache
+SQLite-backed cache of call_llm results keyed on (model, temperature, prompt)
+and whether the call stopped early, so unchanged prompts cost nothing on rerun. Bounded by entry count with
+least-recently-used eviction.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_FILE = "llm_cache.db"
+
+
+def call_key(model: str, temperature: Optional[float], prompt: str, early_stop: bool = False) -> str:
+    # Early-stopped results are truncated, so they get their own keys; full calls keep the original ones.
+    parts = [model, temperature, prompt] + (["early_stop"] if early_stop else [])
+    payload = json.dumps(parts, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCallCache:
+    """Thread-safe on-disk cache of LLM call results with LRU eviction."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_calls_accessed ON calls (accessed_at)")
+        self._db.commit()
+
+    def get(self, model: str, temperature: Optional[float], prompt: str, early_stop: bool = False) -> Optional[Dict]:
+        key = call_key(model, temperature, prompt, early_stop)
+        with self._lock:
+            row = self._db.execute("SELECT result FROM calls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE calls SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, model: str, temperature: Optional[float], prompt: str, result: Dict, early_stop: bool = False):
+        """Store a result; transport errors (no raw model output) are not cached."""
+        if result.get("raw") is None:
+            return
+        key = call_key(model, temperature, prompt, early_stop)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO calls (key, result, accessed_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, default=str), time.time()),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        cursor = self._db.execute(
+            "DELETE FROM calls WHERE key IN ("
+            "SELECT key FROM calls ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evictions += cursor.rowcount
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._evict()
+            self._db.commit()
+            self._db.close()
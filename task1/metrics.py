@@ -0,0 +1,136 @@
+"""
+Rating prediction metrics
+Vectorized NumPy implementations of the evaluation metrics for 1-5 star
+predictions, so scoring stays cheap for hundreds of thousands of rows.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+LABELS = np.arange(1, 6)
+K = len(LABELS)
+
+
+def coerce_predictions(predicted) -> np.ndarray:
+    """Convert raw predictions to float stars, NaN where missing or outside 1-5."""
+    values = pd.to_numeric(pd.Series(predicted, dtype=object), errors="coerce").to_numpy(dtype=float)
+    valid = np.isin(values, LABELS)
+    return np.where(valid, values, np.nan)
+
+
+def confusion_matrix(actual: np.ndarray, predicted: np.ndarray) -> np.ndarray:
+    """K x K counts, rows = actual stars, columns = predicted stars."""
+    cells = (actual.astype(int) - 1) * K + (predicted.astype(int) - 1)
+    return np.bincount(cells, minlength=K * K).reshape(K, K)
+
+
+def macro_f1_from_confusion(cm: np.ndarray) -> np.ndarray:
+    """Macro-F1 for one (K, K) or a batch of (B, K, K) confusion matrices."""
+    tp = np.diagonal(cm, axis1=-2, axis2=-1)
+    support = cm.sum(axis=-1)
+    predicted = cm.sum(axis=-2)
+    denom = support + predicted
+    f1 = np.divide(2 * tp, denom, out=np.zeros(tp.shape, dtype=float), where=denom > 0)
+    # Classes absent from both actual and predicted are left out of the average.
+    present = denom > 0
+    return f1.sum(axis=-1) / np.maximum(present.sum(axis=-1), 1)
+
+
+def quadratic_weighted_kappa(cm: np.ndarray) -> float:
+    n = cm.sum()
+    if n == 0:
+        return 0.0
+    i, j = np.meshgrid(LABELS, LABELS, indexing="ij")
+    weights = (i - j) ** 2 / (K - 1) ** 2
+    expected = np.outer(cm.sum(axis=1), cm.sum(axis=0)) / n
+    denom = (weights * expected).sum()
+    return float(1 - (weights * cm).sum() / denom) if denom else 0.0
+
+
+def bootstrap_ci(
+    actual: np.ndarray,
+    predicted: np.ndarray,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 42,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Percentile bootstrap intervals for accuracy, MAE and macro-F1.
+
+    Resamples are drawn in batches so memory stays around batch_size * n indices.
+    """
+    n = len(actual)
+    if n == 0:
+        return {}
+    rng = np.random.default_rng(seed)
+    batch_size = batch_size or max(1, min(n_boot, 5_000_000 // n))
+    cells = (actual.astype(int) - 1) * K + (predicted.astype(int) - 1)
+    correct = (actual == predicted).astype(float)
+    abs_err = np.abs(actual - predicted)
+
+    accuracy, mae, macro_f1 = [], [], []
+    for start in range(0, n_boot, batch_size):
+        b = min(batch_size, n_boot - start)
+        idx = rng.integers(0, n, size=(b, n))
+        accuracy.append(correct[idx].mean(axis=1))
+        mae.append(abs_err[idx].mean(axis=1))
+        offsets = (np.arange(b) * K * K)[:, None]
+        cms = np.bincount((cells[idx] + offsets).ravel(), minlength=b * K * K).reshape(b, K, K)
+        macro_f1.append(macro_f1_from_confusion(cms))
+
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    return {
+        name: tuple(float(v) for v in np.percentile(np.concatenate(samples), q))
+        for name, samples in (("accuracy", accuracy), ("mae", mae), ("macro_f1", macro_f1))
+    }
+
+
+def evaluate_predictions(
+    actual,
+    predicted,
+    valid_json=None,
+    n_boot: int = 1000,
+    seed: int = 42,
+) -> Dict:
+    """
+    Compute all metrics for one set of predictions.
+
+    Rates are percentages over rows with a valid 1-5 prediction; json_validity
+    is the share of all rows with one.
+    """
+    actual = np.asarray(actual, dtype=float)
+    predicted = coerce_predictions(predicted)
+    valid = ~np.isnan(predicted)
+    if valid_json is not None:
+        valid &= np.asarray(valid_json, dtype=bool)
+
+    a, p = actual[valid], predicted[valid]
+    total = len(actual)
+    if len(a) == 0:
+        return {
+            "accuracy": 0, "json_validity": 0, "macro_f1": 0, "mae": None,
+            "off_by_one_accuracy": 0, "qwk": 0, "confusion_matrix": np.zeros((K, K), dtype=int).tolist(),
+            "ci": {}, "valid_samples": 0, "total_samples": total,
+        }
+
+    cm = confusion_matrix(a, p)
+    abs_err = np.abs(a - p)
+    ci = bootstrap_ci(a, p, n_boot=n_boot, seed=seed) if n_boot else {}
+    return {
+        "accuracy": round(float((abs_err == 0).mean() * 100), 2),
+        "json_validity": round(float(valid.sum() / total * 100), 2),
+        "macro_f1": round(float(macro_f1_from_confusion(cm)), 4),
+        "mae": round(float(abs_err.mean()), 4),
+        "off_by_one_accuracy": round(float((abs_err <= 1).mean() * 100), 2),
+        "qwk": round(quadratic_weighted_kappa(cm), 4),
+        "confusion_matrix": cm.tolist(),
+        "ci": {
+            name: [round(lo * (100 if name == "accuracy" else 1), 4), round(hi * (100 if name == "accuracy" else 1), 4)]
+            for name, (lo, hi) in ci.items()
+        },
+        "valid_samples": int(valid.sum()),
+        "total_samples": total,
+    }
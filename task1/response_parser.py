@@ -0,0 +1,128 @@
+"""
+LLM response parsing
+Extracts the rating JSON from model output without a greedy regex: fenced code
+blocks are tried first, then every `{`/`[` is tried as the start of a JSON
+value with json.JSONDecoder.raw_decode, and the first object with a usable
+predicted_stars wins. StreamingPredictionParser does the same incrementally,
+so a streamed call can stop as soon as the rating has arrived.
+"""
+
+import json
+import re
+from typing import Dict, Iterator, Optional, Tuple, Type
+
+_FENCE = re.compile(r"```[a-zA-Z0-9_-]*\s*\n?(.*?)```", re.DOTALL)
+_STARS = re.compile(r'"predicted_stars"\s*:\s*"?\s*(-?\d+(?:\.\d+)?)\s*"?\s*[,}\n]')
+_decoder = json.JSONDecoder()
+
+
+def candidate_segments(text: str) -> Iterator[str]:
+    """Contents of fenced code blocks (in order), then the whole text."""
+    for match in _FENCE.finditer(text):
+        yield match.group(1)
+    yield text
+
+
+def iter_json_values(text: str, openers: str = "{[") -> Iterator:
+    """
+    Yield every top-level JSON value embedded in `text`.
+
+    Scanning resumes after each decoded value, so nested objects are not
+    yielded separately and trailing chatter after a value is ignored.
+    """
+    pos = 0
+    while True:
+        starts = [i for i in (text.find(c, pos) for c in openers) if i != -1]
+        if not starts:
+            return
+        start = min(starts)
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pos = start + 1
+            continue
+        yield value
+        pos = end
+
+
+def find_json(text: Optional[str], kind: Type = dict):
+    """First JSON value of type `kind` in `text`, looking inside code fences first."""
+    for segment in candidate_segments(text or ""):
+        for value in iter_json_values(segment, "[" if kind is list else "{"):
+            if isinstance(value, kind):
+                return value
+    return None
+
+
+def coerce_stars(value) -> Optional[int]:
+    """Integer 1-5 from 4, 4.0, "4" or " 4 "; None for anything else."""
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(str(value).strip())
+    except ValueError:
+        return None
+    if not number.is_integer() or not 1 <= number <= 5:
+        return None
+    return int(number)
+
+
+def coerce_prediction(value) -> Optional[Dict]:
+    """Normalize a decoded object to {"predicted_stars": int, "explanation": str}."""
+    if not isinstance(value, dict):
+        return None
+    stars = coerce_stars(value.get("predicted_stars"))
+    if stars is None:
+        return None
+    explanation = value.get("explanation", "")
+    return {**value, "predicted_stars": stars, "explanation": "" if explanation is None else str(explanation)}
+
+
+def parse_prediction(text: Optional[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Return (data, None) for the first object with a valid rating, otherwise
+    (None, error) describing why nothing usable was found.
+    """
+    saw_json = False
+    for segment in candidate_segments(text or ""):
+        for value in iter_json_values(segment, "{"):
+            saw_json = True
+            data = coerce_prediction(value)
+            if data is not None:
+                return data, None
+    return None, ("Missing or invalid predicted_stars" if saw_json else "Invalid JSON")
+
+
+class StreamingPredictionParser:
+    """
+    Accumulates streamed text and reports the rating as soon as a complete
+    `"predicted_stars": <n>` pair has been received.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.stars: Optional[int] = None
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Append a chunk; returns the rating once it is known."""
+        self.buffer += chunk or ""
+        if self.stars is None:
+            # Rescan a short overlap so a key split across chunks is still found.
+            for match in _STARS.finditer(self.buffer, max(0, self._scan_from - 32)):
+                stars = coerce_stars(match.group(1))
+                if stars is not None:
+                    self.stars = stars
+                    break
+            self._scan_from = len(self.buffer)
+        return self.stars
+
+    def result(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Parse the buffered text; if it was cut off after the rating, fall back
+        to a prediction without an explanation.
+        """
+        data, error = parse_prediction(self.buffer)
+        if data is None and self.stars is not None:
+            return {"predicted_stars": self.stars, "explanation": ""}, None
+        return data, error
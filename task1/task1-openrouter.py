@@ -4,26 +4,46 @@ Evaluates three different prompting approaches for LLM-based sentiment classific
 """
 
 import pandas as pd
+import numpy as np
 import json
+import argparse
 import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 from openai import OpenAI
-import re
+from eval_runner import run_calls
+from checkpoint import Checkpoint, checkpoint_key, review_id
+from yelp_data import DEFAULT_DATASET, load_training_split, load_yelp_dataset
+from metrics import evaluate_predictions
+from batch_prompting import evaluate_batched
+from llm_cache import DEFAULT_CACHE_FILE, LLMCallCache
+from baseline import HashedLogisticBaseline, train_baseline
+from cascade import cascade_responses, confidence_margin
+from response_parser import StreamingPredictionParser, parse_prediction
 
 load_dotenv()
 
 # Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+MODEL = "google/gemini-2.0-flash-exp:free"
 SAMPLE_SIZE = 200
+CHECKPOINT_FILE = "evaluation_checkpoint.jsonl"
+CACHE_MAX_ENTRIES = 100000
+TEMPERATURE = 0.3
+CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+EARLY_STOP = os.getenv("EVAL_EARLY_STOP", "0") == "1"  # stream and stop once predicted_stars arrives
+RATE_LIMIT = float(os.getenv("EVAL_RATE_LIMIT", "0.33"))  # requests/sec; free-tier models allow ~20/min
 
 client = OpenAI(
     base_url="https://openrouter.ai/api/v1",
     api_key=OPENROUTER_API_KEY,
 )
 
+# Set in main() unless --no-cache is given
+llm_cache = None
+
 # Prompting Strategies
 PROMPT_APPROACH_1 = """You are a restaurant review sentiment classifier. Your task is to read a review and predict the star rating (1-5).
 
@@ -63,36 +83,43 @@ Review: "{review}"
 Respond ONLY with valid JSON:
 {{"predicted_stars": <number 1-5>, "explanation": "<brief reason>"}}"""
 
-def load_yelp_dataset(csv_path: str, sample_size: int = 200) -> pd.DataFrame:
-    """Load and preprocess Yelp reviews dataset."""
-    df = pd.read_csv(csv_path)
-    df = df[['text', 'stars']].dropna()
-    df = df.rename(columns={'text': 'review_text', 'stars': 'rating'})
-    df = df.sample(n=min(sample_size, len(df)), random_state=42)
-    return df.reset_index(drop=True)
-
-def call_llm(prompt: str, max_retries: int = 3) -> Dict:
-    """Execute LLM API call with retry logic and error handling."""
+def call_llm(prompt: str, max_retries: int = 3, early_stop: bool = False) -> Dict:
+    """
+    Execute LLM API call with retry logic and error handling.
+    
+    With `early_stop` the completion is streamed and closed as soon as
+    predicted_stars has arrived, at the cost of a possibly empty explanation.
+    """
     for attempt in range(max_retries):
         try:
-            response = client.chat.completions.create(
-                model="google/gemini-2.0-flash-exp:free",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-            )
-            
-            response_text = response.choices[0].message.content.strip()
+            if early_stop:
+                parser = StreamingPredictionParser()
+                stream = client.chat.completions.create(
+                    model=MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=TEMPERATURE,
+                    stream=True,
+                )
+                try:
+                    for chunk in stream:
+                        if chunk.choices and parser.feed(chunk.choices[0].delta.content or "") is not None:
+                            break
+                finally:
+                    stream.close()
+                response_text = parser.buffer.strip()
+                result, error = parser.result()
+            else:
+                response = client.chat.completions.create(
+                    model=MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=TEMPERATURE,
+                )
+                response_text = response.choices[0].message.content.strip()
+                result, error = parse_prediction(response_text)
             
-            try:
-                result = json.loads(response_text)
+            if result is not None:
                 return {"success": True, "data": result, "raw": response_text}
-            except json.JSONDecodeError:
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    return {"success": True, "data": result, "raw": response_text}
-                else:
-                    return {"success": False, "error": "Invalid JSON", "raw": response_text}
+            return {"success": False, "error": error, "raw": response_text}
                     
         except Exception as e:
             if attempt < max_retries - 1:
@@ -102,70 +129,261 @@ def call_llm(prompt: str, max_retries: int = 3) -> Dict:
     
     return {"success": False, "error": "Max retries exceeded", "raw": None}
 
+def cached_response(prompt: str, early_stop: Optional[bool] = None) -> Optional[Dict]:
+    """Return a cached call_llm result for `prompt` made in the same early-stop mode, if any."""
+    early_stop = EARLY_STOP if early_stop is None else early_stop
+    return llm_cache.get(MODEL, TEMPERATURE, prompt, early_stop=early_stop) if llm_cache else None
+
+def cache_response(prompt: str, result: Dict, early_stop: Optional[bool] = None):
+    """Store a call_llm result for `prompt` in the persistent cache."""
+    early_stop = EARLY_STOP if early_stop is None else early_stop
+    if llm_cache:
+        llm_cache.set(MODEL, TEMPERATURE, prompt, result, early_stop=early_stop)
+
+def cached_call_llm(prompt: str, early_stop: Optional[bool] = None) -> Dict:
+    """call_llm that caches successful results; parse failures are retried on the next run."""
+    early_stop = EARLY_STOP if early_stop is None else early_stop
+    result = call_llm(prompt, early_stop=early_stop)
+    if result["success"]:
+        cache_response(prompt, result, early_stop=early_stop)
+    return result
+
+def score_approach(df: pd.DataFrame, approach_name: str, responses: List[Dict]) -> Dict:
+    """Score one approach's responses (in `df` order) against the true ratings."""
+    data = [response["data"] if response["success"] else {} for response in responses]
+    results = pd.DataFrame({
+        "actual": df['rating'].to_numpy(dtype=int),
+        "predicted": [d.get("predicted_stars") for d in data],
+        "explanation": [
+            d.get("explanation", "") if response["success"] else response.get("error", "")
+            for d, response in zip(data, responses)
+        ],
+        "valid_json": np.array([response["success"] for response in responses], dtype=bool),
+        "execution_time": np.array([response["latency"] for response in responses], dtype=float),
+    })
+    
+    # Calculate evaluation metrics
+    metrics = evaluate_predictions(results["actual"], results["predicted"], results["valid_json"])
+    # Cache hits were never timed (latency None); averaging them in as 0 ms would fake the speed.
+    execution_times = results["execution_time"].dropna().to_numpy()
+    timed = len(execution_times) > 0
+    
+    return {
+        "approach": approach_name,
+        "accuracy": metrics["accuracy"],
+        "json_validity": metrics["json_validity"],
+        # Exact-match rate among valid predictions, as originally defined
+        "consistency": metrics["accuracy"],
+        "macro_f1": metrics["macro_f1"],
+        "mae": metrics["mae"],
+        "off_by_one_accuracy": metrics["off_by_one_accuracy"],
+        "qwk": metrics["qwk"],
+        "confusion_matrix": metrics["confusion_matrix"],
+        "ci": metrics["ci"],
+        "avg_time_ms": round(float(execution_times.mean()) * 1000, 2) if timed else None,
+        "p50_time_ms": round(float(np.percentile(execution_times, 50)) * 1000, 2) if timed else None,
+        "p95_time_ms": round(float(np.percentile(execution_times, 95)) * 1000, 2) if timed else None,
+        "reviews_per_sec": round(1 / execution_times.mean(), 2) if timed and execution_times.mean() else None,
+        "timed_samples": len(execution_times),
+        "cache_hits": sum(bool(response.get("cached")) for response in responses),
+        "total_samples": metrics["total_samples"],
+        "valid_samples": metrics["valid_samples"],
+        "detailed_results": results.astype(object).where(results.notna(), None).to_dict("records")
+    }
+
+def evaluate_approaches(df: pd.DataFrame, approaches: List[Tuple[str, str]],
+                        concurrency: int = CONCURRENCY, rate_limit: float = RATE_LIMIT,
+                        checkpoint: Optional[Checkpoint] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Evaluate every (approach, review) pair concurrently.
+    
+    Pairs already in the checkpoint are reused; new results are appended to it
+    as they complete. Returns per-approach results in `approaches` order and run
+    stats for the calls actually made.
+    """
+    pairs = [
+        (approach_name, review_id(row), prompt_template.format(review=row['review_text']))
+        for approach_name, prompt_template in approaches
+        for _, row in df.iterrows()
+    ]
+    keys = [checkpoint_key(approach_name, rid, MODEL, prompt, early_stop=EARLY_STOP) for approach_name, rid, prompt in pairs]
+    responses = [checkpoint.get(key) if checkpoint else None for key in keys]
+    pending = [i for i, response in enumerate(responses) if response is None]
+    
+    if len(pending) < len(pairs):
+        print(f"    Resuming: {len(pairs) - len(pending)} results loaded from checkpoint")
+    
+    def on_result(j: int, response: Dict):
+        responses[pending[j]] = response
+        if checkpoint:
+            checkpoint.record(keys[pending[j]], response)
+    
+    start_time = time.time()
+    run_calls([pairs[i][2] for i in pending], cached_call_llm, concurrency=concurrency,
+              rate_limit=rate_limit or None, on_result=on_result, lookup=cached_response)
+    wall_time = time.time() - start_time
+    
+    n = len(df)
+    results = [
+        score_approach(df, approach_name, responses[i * n:(i + 1) * n])
+        for i, (approach_name, _) in enumerate(approaches)
+    ]
+    return results, {"requests": len(pending), "resumed": len(pairs) - len(pending), "wall_time": wall_time}
+
 def evaluate_approach(df: pd.DataFrame, approach_name: str, prompt_template: str) -> Dict:
     """Evaluate single prompting approach across dataset."""
+    results, _ = evaluate_approaches(df, [(approach_name, prompt_template)])
+    return results[0]
+
+def evaluate_batch_sizes(df: pd.DataFrame, batch_sizes: List[int],
+                         concurrency: int = CONCURRENCY, rate_limit: float = RATE_LIMIT) -> List[Dict]:
+    """
+    Evaluate the batched prompt variant for each batch size K.
+    
+    Returns one scored result per K, with request counts and throughput.
+    """
     results = []
-    execution_times = []
-    
-    for idx, row in df.iterrows():
-        prompt = prompt_template.format(review=row['review_text'])
-        
-        start_time = time.time()
-        response = call_llm(prompt)
-        execution_time = time.time() - start_time
-        execution_times.append(execution_time)
-        
-        if response["success"]:
-            predicted = response["data"].get("predicted_stars")
-            explanation = response["data"].get("explanation", "")
-            is_valid_json = True
-        else:
-            predicted = None
-            explanation = response.get("error", "")
-            is_valid_json = False
-        
-        results.append({
-            "actual": int(row['rating']),
-            "predicted": predicted,
-            "explanation": explanation,
-            "valid_json": is_valid_json,
-            "execution_time": execution_time
+    for batch_size in batch_sizes:
+        print(f"    Batch size K={batch_size}...")
+        responses, stats = evaluate_batched(
+            list(df['review_text']), batch_size, lambda prompt: call_llm(prompt, early_stop=False),
+            concurrency=concurrency, rate_limit=rate_limit or None,
+            lookup=lambda prompt: cached_response(prompt, early_stop=False),
+            remember=lambda prompt, result: cache_response(prompt, result, early_stop=False)
+        )
+        result = score_approach(df, f"Batched Direct (K={batch_size})", responses)
+        result.update({
+            "batch_size": batch_size,
+            "requests": stats["requests"],
+            "requeried": stats["requeried"],
+            # Wall-clock throughput is only meaningful when every batch was actually sent.
+            "reviews_per_sec": round(len(df) / stats["wall_time"], 2) if stats["wall_time"] and not stats["cached"] else None,
         })
-        
-        if (idx + 1) % 10 == 0:
-            print(f"    Progress: {idx + 1}/{len(df)} reviews processed...")
+        results.append(result)
+    return results
+
+def evaluate_local_baseline(df: pd.DataFrame, dataset: str, use_cache: bool = True,
+                            max_train_rows: Optional[int] = None) -> Tuple[Dict, HashedLogisticBaseline]:
+    """
+    Train the hashed n-gram baseline on the reviews outside `df` and score it.
     
-    # Calculate evaluation metrics
-    valid_results = [r for r in results if r["valid_json"] and r["predicted"] is not None]
-    correct = sum(1 for r in valid_results if r["actual"] == r["predicted"])
+    Prediction time is spread evenly over the reviews, so avg_time_ms and
+    reviews_per_sec compare directly with the LLM rows.
+    """
+    eval_ids = [review_id(row) for _, row in df.iterrows()]
+    train = load_training_split(dataset, exclude_ids=eval_ids, max_rows=max_train_rows,
+                                use_cache=use_cache)
+    model, train_time = train_baseline(list(train['review_text']), train['rating'])
     
-    accuracy = (correct / len(valid_results) * 100) if valid_results else 0
-    json_validity = (len(valid_results) / len(results) * 100)
-    avg_execution_time = sum(execution_times) / len(execution_times)
+    start_time = time.time()
+    predictions = model.predict(list(df['review_text']))
+    predict_time = time.time() - start_time
     
-    differences = [abs(r["actual"] - r["predicted"]) for r in valid_results if r["predicted"]]
-    consistency = sum(d == 0 for d in differences) / len(differences) * 100 if differences else 0
+    latency = predict_time / max(len(df), 1)
+    responses = [
+        {"success": True, "data": {"predicted_stars": int(stars), "explanation": ""}, "latency": latency}
+        for stars in predictions
+    ]
+    result = score_approach(df, "Local Baseline (hashed n-grams)", responses)
+    result.update({
+        "train_samples": len(train),
+        "train_time_s": round(train_time, 2),
+        "reviews_per_sec": round(len(df) / predict_time, 2) if predict_time else 0,
+    })
+    return result, model
+
+def evaluate_cascade(df: pd.DataFrame, model: HashedLogisticBaseline, prompt_template: str,
+                     thresholds: List[float], llm_latency: Optional[float] = None,
+                     concurrency: int = CONCURRENCY, rate_limit: float = RATE_LIMIT) -> List[Dict]:
+    """
+    Score the local-first cascade at each margin threshold.
     
-    return {
-        "approach": approach_name,
-        "accuracy": round(accuracy, 2),
-        "json_validity": round(json_validity, 2),
-        "consistency": round(consistency, 2),
-        "avg_time_ms": round(avg_execution_time * 1000, 2),
-        "total_samples": len(results),
-        "valid_samples": len(valid_results),
-        "detailed_results": results
-    }
+    The LLM is called once, with `prompt_template`, for every review below the
+    largest threshold; smaller thresholds reuse those answers. Each escalation
+    is charged the mean uncached LLM latency (`llm_latency` if every answer was
+    cached), so throughput reflects a cold run; timings are left empty when
+    neither is known.
+    """
+    start_time = time.time()
+    proba = model.predict_proba(list(df['review_text']))
+    local_latency = (time.time() - start_time) / max(len(df), 1)
+    
+    escalate = np.flatnonzero(confidence_margin(proba) < max(thresholds))
+    texts = df['review_text'].to_numpy()
+    llm_results = run_calls([prompt_template.format(review=texts[i]) for i in escalate], cached_call_llm,
+                            concurrency=concurrency, rate_limit=rate_limit or None, lookup=cached_response)
+    llm_responses = dict(zip(escalate.tolist(), llm_results))
+    fresh = [r["latency"] for r in llm_results if not r.get("cached")]
+    if fresh:
+        llm_latency = float(np.mean(fresh))
+    
+    results = []
+    for threshold in sorted(thresholds):
+        responses, escalated = cascade_responses(proba, local_latency, llm_responses, threshold, llm_latency)
+        result = score_approach(df, f"Cascade (margin < {threshold})", responses)
+        result.update({
+            "threshold": threshold,
+            "escalated": escalated,
+            "escalated_fraction": round(escalated / max(len(df), 1) * 100, 2),
+        })
+        if escalated and llm_latency is None:
+            # No LLM latency was measured in this run or the LLM rows, so the cascade's timing is unknown.
+            result.update({"avg_time_ms": None, "p50_time_ms": None, "p95_time_ms": None, "reviews_per_sec": None})
+        results.append(result)
+    return results
+
+def format_timing(value: Optional[float], unit: str = "") -> str:
+    """Render a latency or throughput figure, or "n/a (cached)" when nothing was timed."""
+    return "n/a (cached)" if value is None else f"{value}{unit}"
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate prompting approaches for Yelp rating prediction")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET,
+                        help="Yelp reviews CSV, or the Kaggle zip containing it")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the dataset in chunks of this many rows and reservoir-sample it (with --no-dataset-cache)")
+    parser.add_argument("--no-dataset-cache", action="store_true",
+                        help="Parse the CSV directly instead of using the columnar cache")
+    parser.add_argument("--stratify", choices=["balanced", "proportional"], default=None,
+                        help="Sample by star rating from the cache's per-class indexes")
+    parser.add_argument("--sample-size", type=int, default=SAMPLE_SIZE, help="Number of reviews to evaluate")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Maximum in-flight LLM requests")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT,
+                        help="Maximum LLM requests per second (0 disables the limiter)")
+    parser.add_argument("--batch-sizes", type=lambda v: [int(k) for k in v.split(",") if k], default=[],
+                        help="Comma-separated K values for the multi-review batched prompt, e.g. 5,10,20")
+    parser.add_argument("--early-stop", action="store_true", default=EARLY_STOP,
+                        help="Stream single-review calls and stop reading once predicted_stars arrives")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the persistent LLM call cache")
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_FILE, help="SQLite file for the LLM call cache")
+    parser.add_argument("--cache-size", type=int, default=CACHE_MAX_ENTRIES,
+                        help="Maximum cached calls before least-recently-used eviction")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="Skip training and scoring the local hashed n-gram baseline")
+    parser.add_argument("--baseline-train-rows", type=int, default=None,
+                        help="Cap the baseline's training split at this many reviews")
+    parser.add_argument("--cascade-thresholds", type=lambda v: [float(t) for t in v.split(",") if t], default=[],
+                        help="Comma-separated confidence margins for the local-first cascade, e.g. 0.1,0.2,0.4")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help="JSONL file of completed calls to resume from (empty string disables)")
+    return parser.parse_args()
 
 def main():
     """Execute evaluation workflow for all prompting approaches."""
+    global llm_cache, EARLY_STOP
+    args = parse_args()
+    EARLY_STOP = args.early_stop
+    if not args.no_cache:
+        llm_cache = LLMCallCache(args.cache_file, max_entries=args.cache_size)
+    
     print("=" * 70)
     print("YELP REVIEW RATING PREDICTION - PROMPTING APPROACHES EVALUATION")
     print("Using OpenRouter API")
     print("=" * 70)
     
     print("\n[1] Loading Yelp Reviews Dataset...")
-    df = load_yelp_dataset("yelp_reviews_sample.csv", sample_size=SAMPLE_SIZE)
+    df = load_yelp_dataset(args.dataset, sample_size=args.sample_size, chunksize=args.chunksize,
+                           use_cache=not args.no_dataset_cache, stratify=args.stratify)
     print(f"    Loaded {len(df)} reviews")
     print(f"    Sample review: {df.iloc[0]['review_text'][:100]}...")
     
@@ -177,23 +395,76 @@ def main():
         ("Approach 3: Few-Shot Prompting", PROMPT_APPROACH_3),
     ]
     
-    evaluation_results = []
+    print(f"    Running {len(approaches) * len(df)} requests "
+          f"(concurrency {args.concurrency}, rate limit {args.rate_limit or 'none'} req/s)...")
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    try:
+        evaluation_results, run_stats = evaluate_approaches(
+            df, approaches, concurrency=args.concurrency, rate_limit=args.rate_limit,
+            checkpoint=checkpoint
+        )
+    finally:
+        if checkpoint:
+            checkpoint.close()
     
-    for approach_name, prompt_template in approaches:
-        print(f"\n    Evaluating {approach_name}...")
-        result = evaluate_approach(df, approach_name, prompt_template)
-        evaluation_results.append(result)
+    for result in evaluation_results:
+        print(f"\n    {result['approach']}")
         print(f"    Accuracy: {result['accuracy']}%")
         print(f"    JSON Validity: {result['json_validity']}%")
         print(f"    Consistency: {result['consistency']}%")
+        print(f"    Macro-F1: {result['macro_f1']}  MAE: {result['mae']}  QWK: {result['qwk']}")
+    
+    if args.batch_sizes:
+        print("\n    Evaluating Batched Prompting...")
+        batched_results = evaluate_batch_sizes(
+            df, args.batch_sizes, concurrency=args.concurrency, rate_limit=args.rate_limit
+        )
+        for result in batched_results:
+            print(f"    K={result['batch_size']}: Accuracy {result['accuracy']}%, "
+                  f"{result['requests']} requests ({result['requeried']} reviews re-queried), "
+                  f"{format_timing(result['reviews_per_sec'])} reviews/sec")
+        evaluation_results.extend(batched_results)
+    
+    if not args.no_baseline or args.cascade_thresholds:
+        print("\n    Evaluating Local Baseline...")
+        baseline_result, baseline_model = evaluate_local_baseline(
+            df, args.dataset, use_cache=not args.no_dataset_cache, max_train_rows=args.baseline_train_rows
+        )
+        print(f"    Trained on {baseline_result['train_samples']} reviews in {baseline_result['train_time_s']}s; "
+              f"Accuracy {baseline_result['accuracy']}%, {format_timing(baseline_result['reviews_per_sec'])} reviews/sec")
+        if not args.no_baseline:
+            evaluation_results.append(baseline_result)
+    
+    if args.cascade_thresholds:
+        best_llm = max(evaluation_results[:len(approaches)], key=lambda x: x["accuracy"])
+        print(f"\n    Evaluating Cascade (escalating to {best_llm['approach']})...")
+        cascade_results = evaluate_cascade(
+            df, baseline_model, dict(approaches)[best_llm["approach"]], args.cascade_thresholds,
+            llm_latency=best_llm["avg_time_ms"] / 1000 if best_llm["avg_time_ms"] is not None else None,
+            concurrency=args.concurrency, rate_limit=args.rate_limit
+        )
+        for result in cascade_results:
+            print(f"    margin < {result['threshold']}: Accuracy {result['accuracy']}%, "
+                  f"{result['escalated_fraction']}% escalated, {format_timing(result['reviews_per_sec'])} reviews/sec")
+        evaluation_results.extend(cascade_results)
+    
+    total_requests, wall_time = run_stats["requests"], run_stats["wall_time"]
+    print(f"\n    Throughput: {total_requests / wall_time if wall_time else 0:.2f} requests/sec "
+          f"({total_requests} requests in {wall_time:.1f}s, {run_stats['resumed']} resumed)")
     
     print("\n[3] Comparison Table")
-    print("-" * 70)
-    print(f"{'Approach':<30} {'Accuracy':<12} {'JSON Valid':<12} {'Consistency':<12} {'Avg Time'}")
-    print("-" * 70)
+    print("-" * 137)
+    print(f"{'Approach':<30} {'Accuracy':<12} {'JSON Valid':<12} {'Macro-F1':<10} {'MAE':<8} {'±1 Acc':<10} {'Avg Time':<12} {'p95 Time':<12} {'Reviews/s':<12} {'Cache Hits'}")
+    print("-" * 137)
     
     for result in evaluation_results:
-        print(f"{result['approach']:<30} {result['accuracy']:<12}% {result['json_validity']:<12}% {result['consistency']:<12}% {result['avg_time_ms']}ms")
+        print(f"{result['approach']:<30} {result['accuracy']:<12}% {result['json_validity']:<12}% {result['macro_f1']:<10} {str(result['mae']):<8} {result['off_by_one_accuracy']:<9}% {format_timing(result['avg_time_ms'], 'ms'):<12} {format_timing(result['p95_time_ms'], 'ms'):<12} {format_timing(result['reviews_per_sec']):<12} {result['cache_hits']}/{result['total_samples']}")
+    
+    if llm_cache:
+        cache_stats = llm_cache.stats()
+        print(f"    LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']}% hit rate, {cache_stats['entries']} entries)")
+        llm_cache.close()
     
     print("\n[4] Saving Results...")
     with open("evaluation_results.json", "w") as f:
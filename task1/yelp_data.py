@@ -0,0 +1,284 @@
+"""
+Yelp dataset loading
+Reads reviews straight from the Kaggle zip (or a plain CSV), parsing only the
+columns the evaluation needs, with optional chunked reservoir sampling so
+large dumps can be sampled in bounded memory. Repeated runs read a columnar
+cache instead: memory-mapped star ratings, offsets+bytes blobs for text and
+ids, and per-star index arrays for stratified sampling.
+Download from: https://www.kaggle.com/datasets/omkarsabnis/yelp-reviews-dataset
+"""
+
+import json
+import os
+import zipfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import review_id
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yelp-reviews-dataset.zip")
+
+COLUMNS = ["review_id", "text", "stars"]
+DTYPES = {"review_id": "string", "text": "string", "stars": "Int8"}
+CACHE_VERSION = 1
+STAR_CLASSES = (1, 2, 3, 4, 5)
+
+
+@contextmanager
+def open_dataset(path: str):
+    """Open a CSV, or the first CSV member of a zip archive, as a binary file."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".csv"))
+            with archive.open(member) as f:
+                yield f
+    else:
+        with open(path, "rb") as f:
+            yield f
+
+
+def _tidy(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=["text", "stars"])
+    return df.rename(columns={"text": "review_text", "stars": "rating"})
+
+
+def read_reviews(path: str = DEFAULT_DATASET, chunksize: Optional[int] = None):
+    """Parse only review_id/text/stars; yields DataFrames when `chunksize` is set."""
+    with open_dataset(path) as f:
+        header = pd.read_csv(f, nrows=0).columns
+    usecols = [c for c in COLUMNS if c in header]
+    dtype = {c: DTYPES[c] for c in usecols}
+
+    if chunksize is None:
+        with open_dataset(path) as f:
+            return _tidy(pd.read_csv(f, usecols=usecols, dtype=dtype))
+
+    def chunks() -> Iterator[pd.DataFrame]:
+        with open_dataset(path) as f:
+            for chunk in pd.read_csv(f, usecols=usecols, dtype=dtype, chunksize=chunksize):
+                yield _tidy(chunk)
+
+    return chunks()
+
+
+def reservoir_sample(chunks: Iterator[pd.DataFrame], k: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Uniform sample of k rows from a stream of chunks in O(k + chunk) memory.
+
+    Every row gets a random priority and the k smallest priorities are kept,
+    which is equivalent to reservoir sampling but vectorizes per chunk.
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    for chunk in chunks:
+        chunk = chunk.assign(_priority=rng.random(len(chunk)))
+        reservoir = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        if len(reservoir) > k:
+            reservoir = reservoir.nsmallest(k, "_priority")
+    if reservoir is None:
+        return pd.DataFrame(columns=["review_id", "review_text", "rating"])
+    return reservoir.sort_values("_priority").drop(columns="_priority")
+
+
+def default_cache_dir(path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(path)), ".yelp_cache", os.path.basename(path))
+
+
+def _source_signature(path: str) -> Dict:
+    stat = os.stat(path)
+    return {"source": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class ColumnarCache:
+    """
+    One-time columnar conversion of the dataset.
+
+    stars.npy holds ratings as int8, text/ids are concatenated UTF-8 blobs
+    addressed by int64 offset arrays, and class_<k>.npy lists the row indices
+    for each star rating. Everything is memory-mapped on open.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.stars = np.load(self._file("stars.npy"), mmap_mode="r")
+        self._text = self._blob("text.bin")
+        self._text_offsets = np.load(self._file("text_offsets.npy"), mmap_mode="r")
+        self._ids = self._blob("ids.bin")
+        self._id_offsets = np.load(self._file("id_offsets.npy"), mmap_mode="r")
+        self.class_indices = {k: np.load(self._file(f"class_{k}.npy"), mmap_mode="r") for k in STAR_CLASSES}
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def _blob(self, name: str) -> np.ndarray:
+        # np.memmap refuses zero-length files.
+        if os.path.getsize(self._file(name)) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(self._file(name), dtype=np.uint8, mode="r")
+
+    def __len__(self) -> int:
+        return len(self.stars)
+
+    @staticmethod
+    def is_fresh(path: str, cache_dir: str) -> bool:
+        try:
+            with open(os.path.join(cache_dir, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get("version") == CACHE_VERSION and all(
+            meta.get(k) == v for k, v in _source_signature(path).items()
+        )
+
+    @classmethod
+    def build(cls, path: str, cache_dir: str, chunksize: int = 5000) -> "ColumnarCache":
+        """Convert the dataset chunk by chunk, so building also runs in bounded memory."""
+        os.makedirs(cache_dir, exist_ok=True)
+        stars: List[np.ndarray] = []
+        text_offsets, id_offsets = [0], [0]
+
+        with open(os.path.join(cache_dir, "text.bin"), "wb") as text_out, \
+                open(os.path.join(cache_dir, "ids.bin"), "wb") as ids_out:
+            for chunk in read_reviews(path, chunksize=chunksize):
+                stars.append(chunk["rating"].to_numpy(dtype=np.int8))
+                ids = chunk["review_id"] if "review_id" in chunk else pd.Series([""] * len(chunk))
+                for blob, out, offsets in ((chunk["review_text"], text_out, text_offsets), (ids, ids_out, id_offsets)):
+                    encoded = [str(v).encode("utf-8") for v in blob]
+                    out.write(b"".join(encoded))
+                    offsets.extend((offsets[-1] + np.cumsum([len(e) for e in encoded])).tolist())
+
+        all_stars = np.concatenate(stars) if stars else np.zeros(0, dtype=np.int8)
+        np.save(os.path.join(cache_dir, "stars.npy"), all_stars)
+        np.save(os.path.join(cache_dir, "text_offsets.npy"), np.asarray(text_offsets, dtype=np.int64))
+        np.save(os.path.join(cache_dir, "id_offsets.npy"), np.asarray(id_offsets, dtype=np.int64))
+        for k in STAR_CLASSES:
+            np.save(os.path.join(cache_dir, f"class_{k}.npy"), np.flatnonzero(all_stars == k).astype(np.int32))
+
+        # meta.json is written last, so an interrupted build is never considered fresh.
+        with open(os.path.join(cache_dir, "meta.json"), "w") as f:
+            json.dump({"version": CACHE_VERSION, "rows": int(len(all_stars)), **_source_signature(path)}, f)
+        return cls(cache_dir)
+
+    @classmethod
+    def open(cls, path: str, cache_dir: Optional[str] = None) -> "ColumnarCache":
+        """Open the cache for `path`, rebuilding it if missing or stale."""
+        cache_dir = cache_dir or default_cache_dir(path)
+        if cls.is_fresh(path, cache_dir):
+            return cls(cache_dir)
+        return cls.build(path, cache_dir)
+
+    def _decode(self, blob: np.ndarray, offsets: np.ndarray, i: int) -> str:
+        return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def row_id(self, i: int) -> str:
+        """checkpoint.review_id of row i, decoding the text only when the row has no review_id."""
+        rid = self._decode(self._ids, self._id_offsets, i)
+        return rid or review_id({"review_text": self._decode(self._text, self._text_offsets, i)})
+
+    def rows(self, indices: np.ndarray) -> pd.DataFrame:
+        """Materialize only the requested rows."""
+        return pd.DataFrame({
+            "review_id": [self._decode(self._ids, self._id_offsets, i) for i in indices],
+            "rating": np.asarray(self.stars[indices], dtype=int),
+            "review_text": [self._decode(self._text, self._text_offsets, i) for i in indices],
+        })
+
+    def sample_indices(self, sample_size: int, seed: int = 42, stratify: Optional[str] = None) -> np.ndarray:
+        """
+        Draw row indices without touching the text.
+
+        stratify="balanced" takes an equal share from each star rating,
+        "proportional" keeps the dataset's rating mix; None is uniform.
+        """
+        rng = np.random.default_rng(seed)
+        n = len(self)
+        if stratify is None:
+            return np.sort(rng.choice(n, size=min(sample_size, n), replace=False))
+
+        sizes = np.array([len(self.class_indices[k]) for k in STAR_CLASSES])
+        if stratify == "balanced":
+            quota = np.full(len(STAR_CLASSES), sample_size // len(STAR_CLASSES))
+            quota[:sample_size % len(STAR_CLASSES)] += 1
+        elif stratify == "proportional":
+            quota = np.floor(sample_size * sizes / max(sizes.sum(), 1)).astype(int)
+            quota[np.argsort(-sizes)[:sample_size - quota.sum()]] += 1
+        else:
+            raise ValueError(f"Unknown stratify mode: {stratify}")
+
+        picks = [
+            rng.choice(self.class_indices[k], size=min(q, size), replace=False)
+            for k, q, size in zip(STAR_CLASSES, quota, sizes)
+        ]
+        return np.sort(np.concatenate(picks))
+
+
+def load_yelp_dataset(
+    path: str = DEFAULT_DATASET,
+    sample_size: int = 200,
+    chunksize: Optional[int] = None,
+    seed: int = 42,
+    use_cache: bool = True,
+    stratify: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Load a random sample of Yelp reviews as review_id/review_text/rating.
+
+    By default the sample is drawn from the columnar cache, which is built on
+    first use and rebuilt when the source file changes. Without the cache and
+    with `chunksize`, the file is streamed and reservoir-sampled instead of
+    being parsed into one frame.
+    """
+    if use_cache:
+        cache = ColumnarCache.open(path)
+        df = cache.rows(cache.sample_indices(sample_size, seed=seed, stratify=stratify))
+        # Shuffle so approaches don't see reviews grouped by star rating.
+        return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    if stratify:
+        raise ValueError("Stratified sampling requires the columnar cache")
+    if chunksize:
+        df = reservoir_sample(read_reviews(path, chunksize=chunksize), sample_size, seed=seed)
+    else:
+        df = read_reviews(path)
+        df = df.sample(n=min(sample_size, len(df)), random_state=seed)
+    df["review_text"] = df["review_text"].astype(str)
+    df["rating"] = df["rating"].astype(int)
+    return df.reset_index(drop=True)
+
+
+def load_training_split(
+    path: str = DEFAULT_DATASET,
+    exclude_ids=(),
+    max_rows: Optional[int] = None,
+    seed: int = 42,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Reviews whose checkpoint.review_id is not in `exclude_ids` (the evaluation
+    sample), for training local models. Datasets without a review_id column
+    are matched on the text hash. `max_rows` caps the split with a uniform
+    random subset; raises ValueError if no reviews are left to train on.
+    """
+    exclude = set(exclude_ids)
+    if use_cache:
+        # Filter and subsample on ids first so only the kept rows' text is decoded.
+        cache = ColumnarCache.open(path)
+        keep = np.array([i for i in range(len(cache)) if cache.row_id(i) not in exclude], dtype=np.int64)
+        if max_rows is not None and len(keep) > max_rows:
+            keep = np.sort(np.random.default_rng(seed).choice(keep, size=max_rows, replace=False))
+        df = cache.rows(keep)
+    else:
+        df = read_reviews(path)
+        df["review_text"] = df["review_text"].astype(str)
+        df = df[np.array([review_id(row) not in exclude for row in df.to_dict("records")], dtype=bool)]
+        if max_rows is not None and len(df) > max_rows:
+            df = df.sample(n=max_rows, random_state=seed)
+        df["rating"] = df["rating"].astype(int)
+        df = df.reset_index(drop=True)
+
+    if df.empty:
+        raise ValueError(f"No training reviews left in {path} after excluding the evaluation sample")
+    return df